@@ -0,0 +1,513 @@
+"""
+@startuml
+title Benchmark: MarkdownYAMLConverter
+
+class DocumentSpec {
+    + blocks: int
+    + block_lines: int
+    + prose_lines: int
+    + duplicate_ratio: float
+    + name: str
+}
+
+class Result {
+    + benchmark: str
+    + document: str
+    + size_mb: float
+    + blocks: int
+    + seconds: float
+    + mb_per_s: float
+    + blocks_per_s: float
+    + peak_rss_mb: float
+    + rss_growth_mb: float
+}
+
+class Benchmark {
+    + BENCHMARKS: Dict[str, Callable]
+    + SUITES: Dict[str, List[DocumentSpec]]
+    + make_document(spec: DocumentSpec): str
+    + run_case(name: str, spec: DocumentSpec, repeat: int): Optional[Result]
+    + compare(results: List[Result], baseline_path: str, threshold: float): List[str]
+    + measure_startup(module: str, repeat: int): Tuple[float, List[str]]
+    + check_startup(repeat: int): List[str]
+    + PATHOLOGICAL: Dict[str, Callable[[int], str]]
+    + check_linear(sizes: Tuple[int, int], repeat: int): List[str]
+    + fuzz_consistency(iterations: int, seed: int): List[str]
+    + main(argv: Optional[List[str]]): int
+    - _child(name: str, path: str, repeat: int, queue: Queue): void
+}
+
+Benchmark ..> DocumentSpec: generates
+Benchmark ..> Result: reports
+Benchmark ..> MarkdownYAMLConverter: measures
+
+@enduml
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from markdown_yaml_converter import MarkdownYAMLConverter
+
+
+@dataclass(frozen=True)
+class DocumentSpec:
+    """Shape of a synthetic markdown document."""
+    blocks: int
+    block_lines: int = 4
+    prose_lines: int = 2
+    duplicate_ratio: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return (f"blocks={self.blocks},block_lines={self.block_lines},"
+                f"prose_lines={self.prose_lines},dup={self.duplicate_ratio:g}")
+
+
+@dataclass
+class Result:
+    """Measurements of one benchmark on one document."""
+    benchmark: str
+    document: str
+    size_mb: float
+    blocks: int
+    seconds: float
+    mb_per_s: float
+    blocks_per_s: float
+    peak_rss_mb: float
+    rss_growth_mb: float
+
+
+def make_document(spec: DocumentSpec, seed: int = 0) -> str:
+    """
+    Builds a synthetic markdown document.
+
+    A duplicate_ratio share of the blocks repeats one of a small pool of
+    snippets, like the recurring schema blocks in real Logseq exports.
+
+    Args:
+        spec: Document shape
+        seed: Random seed choosing which blocks are duplicates
+
+    Returns:
+        Markdown document content
+    """
+    rng = random.Random(seed)
+    shared = [
+        ''.join(f"  field_{j}: shared value {k}\n" for j in range(spec.block_lines - 1))
+        for k in range(8)
+    ]
+    parts = []
+    for i in range(spec.blocks):
+        parts.append(f"## Section {i}\n\n")
+        parts.extend(f"Some prose about section {i}, line {j}.\n"
+                     for j in range(spec.prose_lines))
+        if rng.random() < spec.duplicate_ratio:
+            body = f"pattern_base:\n{rng.choice(shared)}"
+        else:
+            body = f"section_{i}:\n" + ''.join(
+                f"  field_{j}: value {i}-{j}\n" for j in range(spec.block_lines - 1))
+        parts.append(f"\n```yaml\n{body}```\n\n")
+    return ''.join(parts)
+
+
+def _extract_yaml_blocks(converter, path, content):
+    converter.extract_yaml_blocks(content)
+
+
+def _iter_yaml_spans(converter, path, content):
+    for span in converter.iter_yaml_spans(content):
+        span.yaml_content
+
+
+def _convert_document(converter, path, content):
+    converter.convert_document(path)
+
+
+def _save_converted_document(converter, path, content):
+    converter.save_converted_document(path, f"{path}.out")
+
+
+def _save_converted_document_streaming(converter, path, content):
+    converter.save_converted_document(path, f"{path}.out", streaming=True)
+
+
+# A "[mode]" suffix selects the converter's validation mode
+BENCHMARKS: Dict[str, Callable] = {
+    'extract_yaml_blocks': _extract_yaml_blocks,
+    'iter_yaml_spans': _iter_yaml_spans,
+    'convert_document': _convert_document,
+    'convert_document[deferred]': _convert_document,
+    'convert_document[off]': _convert_document,
+    'save_converted_document': _save_converted_document,
+    'save_converted_document[streaming]': _save_converted_document_streaming,
+}
+
+SUITES: Dict[str, List[DocumentSpec]] = {
+    'quick': [
+        DocumentSpec(1000),
+        DocumentSpec(1000, duplicate_ratio=0.9),
+    ],
+    'full': [
+        DocumentSpec(1000),
+        DocumentSpec(10000),
+        DocumentSpec(10000, duplicate_ratio=0.5),
+        DocumentSpec(10000, duplicate_ratio=0.9),
+        DocumentSpec(2000, block_lines=40),
+        DocumentSpec(2000, prose_lines=200),
+        DocumentSpec(50000, block_lines=2, prose_lines=0),
+    ],
+}
+
+# The tuple API keeps a prefix and suffix copy per block, i.e. roughly
+# blocks * len(content) characters; skip sizes that would exhaust memory.
+TUPLE_MEMORY_BUDGET = 2 * 1024 ** 3
+
+# Reference run, 20000 unique blocks (2.1 MB), CSafeLoader:
+#   strict    1.14 s   1.8 MB/s
+#   deferred  1.24 s   1.7 MB/s  (parsing holds the GIL; the gain is that
+#                                 output is produced before validation ends)
+#   off       0.07 s  30.6 MB/s
+
+# Cumulative `python -X importtime` budgets in ms. The pre-commit hook pays
+# this on every run; reference (ms): converter 45, batch 48, down from 74
+# and 97 before yaml, difflib and concurrent.futures were imported lazily.
+STARTUP_BUDGETS_MS = {
+    'markdown_yaml_converter': 60,
+    'markdown_yaml_batch': 75,
+}
+# Heavy modules a plain import must not pull in
+LAZY_MODULES = ('yaml', 'difflib', 'concurrent.futures', 'multiprocessing',
+                'sqlite3')
+
+# Inputs on which a backtracking fence pattern goes super-linear (the old
+# DOTALL regex needed 42 s for 260 KB of inline_openers), keyed by name and
+# built from a repetition count
+PATHOLOGICAL: Dict[str, Callable[[int], str]] = {
+    'inline_openers': lambda n: 'text ```yaml\n' * n,
+    'unterminated': lambda n: '```yaml\n' + 'key: value\n' * n,
+    'tildes_in_backticks': lambda n: '```yaml\n' + '~~~\n' * n,
+    'short_closers': lambda n: '````yaml\n' + '```\n' * n,
+    'indented_closers': lambda n: '```yaml\n' + '    ```\n' * n,
+    'backtick_info': lambda n: '``` a`b\n' * n,
+    'long_runs': lambda n: ('`' * 1000 + '\n') * (n // 100),
+    'crlf_blocks': lambda n: '```yaml\r\na: 1\r\n```\r\n' * n,
+    # A lone CR after a long run once made the regex retry every split of it
+    'lone_cr_run': lambda n: '`' * n + '\rx\n',
+    # One line spanning many streaming chunks was once re-searched per chunk
+    'single_line': lambda n: 'x' * (100 * n) + '\n',
+}
+PATHOLOGICAL_SIZES = (50000, 200000)
+# Allowed growth of the time per byte from the small to the large size
+LINEAR_SLACK = 2.0
+
+# Line fragments the fuzzer assembles documents from
+FUZZ_PIECES = (
+    '```yaml\n', '```\n', '~~~yaml\n', '~~~\n', '````\n', '  ```yaml\n',
+    '   ~~~~yaml\n', '    ```yaml\n', 'a: 1\n', '  b: 2\n', '\n', '```yaml\r\n',
+    '```\r\n', 'x\r\n', '``` yaml `\n', '```python\n', '```  \n',
+    '~~~~~ \t\n', 'text ```yaml\n', '```yaml', '```',
+)
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss survives exec and so includes the parent's peak at spawn
+    # time; VmHWM belongs to this process image only. Both are in KiB.
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(name: str, path: str, repeat: int, queue):
+    """Runs one benchmark in a fresh interpreter so peak RSS is its own."""
+    validation = name.partition('[')[2].rstrip(']')
+    if validation not in ('deferred', 'off'):
+        validation = 'strict'
+    with open(path, 'r') as f:
+        content = f.read()
+    rss_before = _max_rss_mb()
+
+    best = float('inf')
+    for _ in range(repeat):
+        # A fresh converter per round keeps the validation LRU cold
+        converter = MarkdownYAMLConverter(validation=validation)
+        start = time.perf_counter()
+        BENCHMARKS[name](converter, path, content)
+        best = min(best, time.perf_counter() - start)
+        converter.close()
+
+    queue.put((best, _max_rss_mb(), _max_rss_mb() - rss_before))
+
+
+def run_case(name: str, spec: DocumentSpec, repeat: int = 3) -> Optional[Result]:
+    """
+    Measures one benchmark on one synthetic document.
+
+    Args:
+        name: Key of BENCHMARKS
+        spec: Document shape
+        repeat: Rounds to run; the fastest is reported
+
+    Returns:
+        Result, or None when the case is skipped
+    """
+    content = make_document(spec)
+    if name == 'extract_yaml_blocks' and spec.blocks * len(content) > TUPLE_MEMORY_BUDGET:
+        return None
+
+    fd, path = tempfile.mkstemp(suffix='.md')
+    with os.fdopen(fd, 'w') as f:
+        f.write(content)
+    try:
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        process = context.Process(target=_child, args=(name, path, repeat, queue))
+        process.start()
+        seconds, peak_rss, growth = queue.get()
+        process.join()
+    finally:
+        for leftover in (path, f"{path}.out"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    size_mb = len(content.encode('utf-8')) / 1e6
+    return Result(name, spec.name, size_mb, spec.blocks, seconds,
+                  size_mb / seconds, spec.blocks / seconds, peak_rss, growth)
+
+
+def compare(results: List[Result], baseline_path: str,
+            threshold: float) -> List[str]:
+    """
+    Lists the cases that got slower than a stored baseline run.
+
+    Args:
+        results: Current results
+        baseline_path: JSON file written by a previous --json run
+        threshold: Allowed slowdown factor, e.g. 1.25 for 25%
+
+    Returns:
+        One message per regressed case
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = {(r['benchmark'], r['document']): r for r in json.load(f)}
+
+    regressions = []
+    for result in results:
+        before = baseline.get((result.benchmark, result.document))
+        if before and result.seconds > before['seconds'] * threshold:
+            regressions.append(
+                f"{result.benchmark} {result.document}: "
+                f"{before['seconds']:.3f}s -> {result.seconds:.3f}s")
+    return regressions
+
+
+def measure_startup(module: str, repeat: int = 5) -> Tuple[float, List[str]]:
+    """
+    Times importing a module in fresh interpreters with -X importtime.
+
+    Args:
+        module: Module name, importable from this directory
+        repeat: Interpreters to start; the fastest is reported
+
+    Returns:
+        Cumulative import time in ms, and the LAZY_MODULES it loaded
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = float('inf')
+    loaded = set()
+    # The first run may also write the bytecode cache
+    for _ in range(repeat + 1):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+            cwd=here, capture_output=True, text=True, check=True)
+        for line in process.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            name = fields[2].strip()
+            if name == module:
+                best = min(best, int(fields[1]) / 1000)
+            elif name in LAZY_MODULES:
+                loaded.add(name)
+    return best, sorted(loaded)
+
+
+def check_startup(repeat: int = 5) -> List[str]:
+    """
+    Checks the entry points against STARTUP_BUDGETS_MS and LAZY_MODULES.
+
+    Args:
+        repeat: Interpreters to start per module
+
+    Returns:
+        One message per violation
+    """
+    violations = []
+    for module, budget in STARTUP_BUDGETS_MS.items():
+        ms, loaded = measure_startup(module, repeat)
+        print(f"{module:<36} {ms:8.1f} ms  (budget {budget} ms)")
+        if ms > budget:
+            violations.append(f"{module}: import took {ms:.1f} ms, budget {budget} ms")
+        if loaded:
+            violations.append(f"{module}: imports {', '.join(loaded)} eagerly")
+    return violations
+
+
+def check_linear(sizes: Tuple[int, int] = PATHOLOGICAL_SIZES,
+                 repeat: int = 3) -> List[str]:
+    """
+    Checks that conversion time grows linearly on the PATHOLOGICAL inputs,
+    for both the in-memory and the streaming conversion path.
+
+    Args:
+        sizes: Small and large repetition counts
+        repeat: Rounds per size; the fastest is used
+
+    Returns:
+        One message per input whose time per byte grew by more than
+        LINEAR_SLACK
+    """
+    converter = MarkdownYAMLConverter(validation='off')
+    paths = {
+        'content': converter.convert_content,
+        # The streaming path matches fences line by line
+        'stream': lambda content: converter.convert_stream(io.StringIO(content),
+                                                           io.StringIO()),
+    }
+    violations = []
+    for name, build in PATHOLOGICAL.items():
+        for path, convert in paths.items():
+            per_byte = []
+            for n in sizes:
+                content = build(n)
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    convert(content)
+                    best = min(best, time.perf_counter() - start)
+                per_byte.append(best / len(content))
+            growth = per_byte[1] / per_byte[0]
+            label = f"{name} ({path})"
+            print(f"{label:<36} {len(content) / 1e6:8.2f} MB "
+                  f"{1e-6 / per_byte[1]:8.1f} MB/s  growth {growth:5.2f}")
+            if growth > LINEAR_SLACK:
+                violations.append(f"{label}: time per byte grew {growth:.2f}x "
+                                  f"from n={sizes[0]} to n={sizes[1]}")
+    return violations
+
+
+def fuzz_consistency(iterations: int = 10000, seed: int = 0) -> List[str]:
+    """
+    Compares the in-memory, streaming and mmap conversions on random input.
+
+    Args:
+        iterations: Documents to generate from FUZZ_PIECES
+        seed: Random seed
+
+    Returns:
+        One message per document the three paths disagree on
+    """
+    rng = random.Random(seed)
+    converter = MarkdownYAMLConverter(validation='off')
+    mismatches = []
+    fd, path = tempfile.mkstemp(suffix='.md')
+    os.close(fd)
+    try:
+        for _ in range(iterations):
+            content = ''.join(rng.choice(FUZZ_PIECES)
+                              for _ in range(rng.randint(0, 12)))
+            in_memory = converter.convert_content(content)
+
+            streamed = io.StringIO()
+            converter.convert_stream(io.StringIO(content), streamed, chunk_size=7)
+
+            with open(path, 'wb') as f:
+                f.write(content.encode('utf-8'))
+            mapped = io.BytesIO()
+            converter.convert_mmap(path, mapped)
+
+            if not in_memory == streamed.getvalue() == mapped.getvalue().decode('utf-8'):
+                mismatches.append(repr(content))
+    finally:
+        os.remove(path)
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Markdown/YAML conversion pipeline.")
+    parser.add_argument('--suite', choices=SUITES, default='quick')
+    parser.add_argument('-k', '--filter', default='',
+                        help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', metavar='PATH', help="write results here")
+    parser.add_argument('--compare', metavar='PATH',
+                        help="fail if slower than this baseline JSON")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="allowed slowdown factor for --compare")
+    parser.add_argument('--startup', action='store_true',
+                        help="only check import times against STARTUP_BUDGETS_MS")
+    parser.add_argument('--pathological', action='store_true',
+                        help="only check linear scaling on the PATHOLOGICAL inputs")
+    parser.add_argument('--fuzz', type=int, metavar='N',
+                        help="only compare the conversion paths on N random documents")
+    args = parser.parse_args(argv)
+
+    if args.startup or args.pathological or args.fuzz:
+        violations = []
+        if args.startup:
+            violations += check_startup(args.repeat)
+        if args.pathological:
+            violations += check_linear(repeat=args.repeat)
+        if args.fuzz:
+            violations += [f"paths disagree on {doc}" for doc in fuzz_consistency(args.fuzz)]
+        for message in violations:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if violations else 0
+
+    results = []
+    print(f"{'benchmark':<36} {'document':<52} {'MB/s':>8} {'blocks/s':>10} "
+          f"{'peak MB':>8} {'+MB':>7}")
+    for spec in SUITES[args.suite]:
+        for name in BENCHMARKS:
+            if args.filter not in name:
+                continue
+            result = run_case(name, spec, args.repeat)
+            if result is None:
+                print(f"{name:<36} {spec.name:<52} skipped: over TUPLE_MEMORY_BUDGET")
+                continue
+            results.append(result)
+            print(f"{name:<36} {spec.name:<52} {result.mb_per_s:8.1f} "
+                  f"{result.blocks_per_s:10.0f} {result.peak_rss_mb:8.1f} "
+                  f"{result.rss_growth_mb:7.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+@startuml
+title FenceHandler Class Diagram
+
+class FenceHandler {
+    + language: str
+    + start_tag: str
+    + end_tag: str
+    + parse: Optional[Callable[[str], object]]
+    + render: Optional[Callable[[str], Optional[str]]]
+    + to_plantuml(content: str): Optional[str]
+}
+
+class "fence_handlers" as Handlers {
+    + JSON_FENCE: FenceHandler
+    + MERMAID_FENCE: FenceHandler
+    + BUILTIN_FENCES: Dict[str, FenceHandler]
+    + mermaid_to_plantuml(content: str): Optional[str]
+}
+
+note right of FenceHandler
+  parse raises on invalid content (validation);
+  render rewrites the body, returning None
+  to leave the original fence untouched.
+end note
+
+Handlers ..> FenceHandler: provides
+MarkdownYAMLConverter --> "*" FenceHandler: dispatches fences by language
+
+@enduml
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+
+@dataclass(frozen=True)
+class FenceHandler:
+    """How one fenced code block language is validated and rendered."""
+    language: str
+    start_tag: str
+    end_tag: str
+    parse: Optional[Callable[[str], object]] = None
+    render: Optional[Callable[[str], Optional[str]]] = None
+
+    def to_plantuml(self, content: str) -> Optional[str]:
+        """
+        Wraps the (rendered) fence body in the PlantUML tags.
+
+        Args:
+            content: The fence body
+
+        Returns:
+            PlantUML block, or None if the fence should be left as is
+        """
+        body = self.render(content) if self.render else content
+        if body is None:
+            return None
+        return f"{self.start_tag}\n{body}\n{self.end_tag}"
+
+
+# Mermaid sequence arrows and their PlantUML counterparts
+_MERMAID_ARROWS = {
+    '->>': '->', '-->>': '-->',
+    '->': '->', '-->': '-->',
+    '-x': '->x', '--x': '-->x',
+    '-)': '->>', '--)': '-->>',
+}
+_MESSAGE = re.compile(
+    r'^(\s*)([^\s:]+?)\s*(-->>|->>|-->|->|--x|-x|--\)|-\))\s*([+-]?)\s*([^:]+?)\s*:(.*)$')
+_PARTICIPANT_ALIAS = re.compile(r'^(\s*)(participant|actor)\s+(\S+)\s+as\s+(.+?)\s*$')
+_NOTE = re.compile(r'^(\s*)Note\s+(right of|left of|over)\s+([^:]+?)\s*:(.*)$', re.IGNORECASE)
+
+
+def _sequence_line(line: str) -> str:
+    match = _MESSAGE.match(line)
+    if match:
+        indent, source, arrow, activation, target, text = match.groups()
+        # Mermaid +/- (de)activates like PlantUML's ++/-- shortcuts
+        marker = {'+': ' ++', '-': ' --'}.get(activation, '')
+        return f"{indent}{source} {_MERMAID_ARROWS[arrow]} {target}{marker} :{text}"
+
+    match = _PARTICIPANT_ALIAS.match(line)
+    if match:
+        indent, kind, name, label = match.groups()
+        return f'{indent}{kind} "{label}" as {name}'
+
+    match = _NOTE.match(line)
+    if match:
+        indent, position, who, text = match.groups()
+        who = ', '.join(w.strip() for w in who.split(','))
+        return f"{indent}note {position.lower()} {who}:{text}"
+
+    stripped = line.strip()
+    if stripped == 'and':
+        return line.replace('and', 'else', 1)
+    return line
+
+
+def mermaid_to_plantuml(content: str) -> Optional[str]:
+    """
+    Translates a Mermaid sequence or class diagram to PlantUML.
+
+    Class diagram syntax is largely shared, so only the header changes;
+    sequence diagrams get their arrows, aliases and notes rewritten. Other
+    diagram types have no PlantUML counterpart here and are left alone.
+
+    Args:
+        content: The mermaid fence body
+
+    Returns:
+        PlantUML diagram body, or None for unsupported diagram types
+    """
+    lines = content.split('\n')
+    header = next((i for i, line in enumerate(lines) if line.strip()), None)
+    if header is None:
+        return None
+
+    kind = lines[header].strip()
+    body = lines[header + 1:]
+    if kind == 'classDiagram':
+        return '\n'.join(body)
+    if kind == 'sequenceDiagram':
+        return '\n'.join(_sequence_line(line) for line in body)
+    return None
+
+
+JSON_FENCE = FenceHandler('json', '@startjson', '@endjson', parse=json.loads)
+MERMAID_FENCE = FenceHandler('mermaid', '@startuml', '@enduml',
+                             render=mermaid_to_plantuml)
+
+# Opt-in handlers by language; yaml is built into MarkdownYAMLConverter
+BUILTIN_FENCES: Dict[str, FenceHandler] = {
+    handler.language: handler for handler in (JSON_FENCE, MERMAID_FENCE)
+}
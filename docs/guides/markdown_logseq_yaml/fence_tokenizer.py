@@ -0,0 +1,169 @@
+"""
+@startuml
+title FenceTokenizer Class Diagram
+
+class "fence_tokenizer" as Tokenizer {
+    + iter_fences(source: str | bytes): Iterator[Tuple[int, int, int, int, str, int, str]]
+    + match_fence_line(line: str): Optional[Tuple[int, str, str]]
+    + is_closing_fence(line: str, opening_run: str): bool
+    + fence_language(info: str): str
+}
+
+note right of Tokenizer
+  CommonMark fenced code blocks:
+  - up to 3 spaces before a run of >= 3 backticks or tildes
+  - backtick fences may not have a backtick in the info string
+  - closed by a run of the same character, at least as long,
+    followed only by spaces or tabs
+  - an unterminated fence runs to the end of the document
+  Containers (block quotes, list items) are not modelled.
+end note
+
+MarkdownYAMLConverter ..> Tokenizer: locates fences
+
+@enduml
+"""
+
+import re
+from itertools import chain
+from typing import Iterator, Optional, Tuple
+
+# A line that opens or closes a fence: indent, fence run, rest of the line.
+# It never crosses a line break, so scanning a document visits each
+# character a bounded number of times, however the fences are (mis)matched.
+# The rest of the line runs up to the \n and the lookahead always holds,
+# so the engine never backtracks into the fence run; the CR of a CRLF is
+# removed in _info, which also rejects lines split by a lone CR.
+_FENCE_LINE = r'( {0,3})(`{3,}|~{3,})([^\n]*)(?=\n|$)'
+_FENCE_LINE_STR = re.compile(_FENCE_LINE)
+_FENCE_LINE_BYTES = re.compile(_FENCE_LINE.encode('ascii'))
+# Lines after the first are found from their preceding line break; the
+# literal prefix lets the regex engine skip between line breaks quickly
+_NEXT_FENCE_LINE_STR = re.compile('\n' + _FENCE_LINE)
+_NEXT_FENCE_LINE_BYTES = re.compile(('\n' + _FENCE_LINE).encode('ascii'))
+
+
+def _info(match, source, cr, lf):
+    # Info string of a fence line without the CR of its CRLF, or None when
+    # a lone CR ends the line early, which makes it no fence line
+    info = match.group(3)
+    if info[-1:] == cr and source[match.end():match.end() + 1] == lf:
+        info = info[:-1]
+    return None if cr in info else info
+
+
+def fence_language(info: str) -> str:
+    """
+    Extracts the language, the first word of a fence's info string.
+
+    Args:
+        info: Text after the opening fence run
+
+    Returns:
+        The language, or '' for a bare fence
+    """
+    words = info.split(None, 1)
+    return words[0] if words else ''
+
+
+def match_fence_line(line: str) -> Optional[Tuple[int, str, str]]:
+    """
+    Recognises a line that could open a fence.
+
+    Args:
+        line: One line, with or without its line break
+
+    Returns:
+        (indent, fence run, info string), or None
+    """
+    match = _FENCE_LINE_STR.match(line)
+    info = None if match is None else _info(match, line, '\r', '\n')
+    if info is None:
+        return None
+    indent, run = match.group(1, 2)
+    if run[0] == '`' and '`' in info:
+        return None
+    return len(indent), run, info
+
+
+def is_closing_fence(line: str, opening_run: str) -> bool:
+    """
+    Checks whether a line closes the fence opened by opening_run.
+
+    Args:
+        line: One line, with or without its line break
+        opening_run: The backticks or tildes of the opening fence
+
+    Returns:
+        True if the line is a valid closing fence
+    """
+    match = _FENCE_LINE_STR.match(line)
+    info = None if match is None else _info(match, line, '\r', '\n')
+    if info is None:
+        return False
+    run = match.group(2)
+    return (run[0] == opening_run[0] and len(run) >= len(opening_run)
+            and not info.strip(' \t'))
+
+
+def iter_fences(source) -> Iterator[Tuple[int, int, int, int, str, int, str]]:
+    """
+    Tokenizes the fenced code blocks of a document in one linear pass.
+
+    Offsets are character positions for str sources and byte positions for
+    bytes-like sources such as an mmap. start and end span the fence runs,
+    so indentation before the opening fence and anything after the closing
+    run (trailing blanks, the line break) are not part of the block. The
+    content range excludes the line break before the closing fence.
+
+    Args:
+        source: Markdown text as str, or UTF-8 bytes-like object
+
+    Returns:
+        Iterator of (start, end, content_start, content_end, language,
+        indent, newline) tuples for closed fences in document order, where
+        indent is the number of spaces before the opening fence and newline
+        is the opening line's line break
+    """
+    text = isinstance(source, str)
+    if text:
+        first, following = _FENCE_LINE_STR, _NEXT_FENCE_LINE_STR
+        backtick, blanks, cr, lf = '`', ' \t', '\r', '\n'
+    else:
+        first, following = _FENCE_LINE_BYTES, _NEXT_FENCE_LINE_BYTES
+        backtick, blanks, cr, lf = b'`', b' \t', b'\r', b'\n'
+
+    # Closing candidates are drawn from the same iterator as openers, so
+    # every candidate line is inspected exactly once
+    lines = chain(filter(None, [first.match(source)]), following.finditer(source))
+    for opener in lines:
+        info = _info(opener, source, cr, lf)
+        run = opener.group(2)
+        if info is None or (run[:1] == backtick and backtick in info):
+            continue
+        newline = '\r\n' if len(info) < len(opener.group(3)) else '\n'
+        content_start = opener.end() + 1
+        if content_start > len(source):
+            # Opening fence on the last line
+            return
+
+        for closer in lines:
+            closing_run, closing_info = closer.group(2), _info(closer, source, cr, lf)
+            if (closing_info is not None and closing_run[:1] == run[:1]
+                    and len(closing_run) >= len(run) and not closing_info.strip(blanks)):
+                break
+        else:
+            # Unterminated: the rest of the document is its content
+            return
+
+        content_end = closer.start(1)
+        if content_end > content_start:
+            # Drop the line break that ends the last content line
+            content_end -= 1
+            if content_end > content_start and source[content_end - 1:content_end] == cr:
+                content_end -= 1
+
+        if not text:
+            info = bytes(info).decode('utf-8', 'replace')
+        yield (opener.start(2), closer.end(2), content_start, content_end,
+               fence_language(info), len(opener.group(1)), newline)
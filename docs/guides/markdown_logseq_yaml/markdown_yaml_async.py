@@ -0,0 +1,119 @@
+"""
+@startuml
+title AsyncMarkdownYAMLConverter Class Diagram
+
+class AsyncMarkdownYAMLConverter {
+    + converter: MarkdownYAMLConverter
+    + max_concurrency: int
+    - _executor: ThreadPoolExecutor
+    - _semaphore: Optional[Semaphore]
+    + __init__(converter: Optional[MarkdownYAMLConverter], max_concurrency: int)
+    + convert_content(content: str): str {async}
+    + convert_document(filepath: str): str {async}
+    + save_converted_document(input_path: str, output_path: str): void {async}
+    + convert_many(pairs: Iterable[Tuple[str, str]]): List[Optional[BaseException]] {async}
+    + close(): void
+    - _run(func: Callable, *args): Any {async}
+}
+
+AsyncMarkdownYAMLConverter --> MarkdownYAMLConverter: delegates in executor threads
+
+@enduml
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from markdown_yaml_converter import MarkdownYAMLConverter
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r') as f:
+        return f.read()
+
+
+class AsyncMarkdownYAMLConverter:
+    """asyncio front end that keeps file I/O and YAML parsing off the event loop."""
+
+    def __init__(self, converter: Optional[MarkdownYAMLConverter] = None,
+                 max_concurrency: int = 8):
+        """
+        Args:
+            converter: Converter to delegate to; a default one when omitted
+            max_concurrency: Documents processed at the same time, which is
+                also the executor size
+        """
+        self.converter = converter or MarkdownYAMLConverter()
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _run(self, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _limit(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def convert_content(self, content: str) -> str:
+        """
+        Converts markdown content in an executor thread.
+
+        Args:
+            content: The markdown document content
+
+        Returns:
+            Converted document content
+        """
+        async with self._limit():
+            return await self._run(self.converter.convert_content, content)
+
+    async def convert_document(self, filepath: str) -> str:
+        """
+        Reads and converts a document without blocking the event loop.
+
+        Args:
+            filepath: Path to the markdown document
+
+        Returns:
+            Converted document content
+        """
+        async with self._limit():
+            content = await self._run(_read_text, filepath)
+            return await self._run(self.converter.convert_content, content)
+
+    async def save_converted_document(self, input_path: str, output_path: str):
+        """
+        Converts and atomically saves a document without blocking the loop.
+
+        Args:
+            input_path: Source markdown file path
+            output_path: Destination file path
+        """
+        async with self._limit():
+            await self._run(self.converter.save_converted_document,
+                            input_path, output_path)
+
+    async def convert_many(self, pairs: Iterable[Tuple[str, str]]
+                           ) -> List[Optional[BaseException]]:
+        """
+        Saves many documents, at most max_concurrency at a time.
+
+        Args:
+            pairs: (input_path, output_path) tuples
+
+        Returns:
+            Per pair, None on success or the raised exception
+        """
+        results = await asyncio.gather(
+            *(self.save_converted_document(i, o) for i, o in pairs),
+            return_exceptions=True)
+        return [r if isinstance(r, BaseException) else None for r in results]
+
+    def close(self):
+        """Shuts down the executor threads."""
+        self._executor.shutdown()
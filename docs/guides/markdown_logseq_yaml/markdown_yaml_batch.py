@@ -0,0 +1,383 @@
+"""
+@startuml
+title MarkdownYAMLBatch Class Diagram
+
+class FileResult {
+    + input_path: str
+    + output_path: str
+    + seconds: float
+    + error: Optional[str]
+    + cached: bool
+    + cache_delta: Optional[dict]
+    + ok: bool
+}
+
+class "markdown_yaml_batch" as Batch {
+    + find_documents(root: str, include: Sequence[str], exclude: Sequence[str]): List[str]
+    + effective_excludes(root: str, output_dir: Optional[str], include, exclude): List[str]
+    + matches(root: str, path: str, include, exclude): bool
+    + output_path_for(input_path: str, root: str, output_dir: Optional[str]): str
+    + fence_languages(fences: Sequence[str]): List[str]
+    + convert_directory(root: str, output_dir: Optional[str], include, exclude, jobs: int, streaming: bool, cache: Optional[ConversionCache], validation: str, memory_map: bool, fences: Sequence[str], in_place: bool, index: Optional[str]): List[FileResult]
+    + main(argv: Optional[List[str]]): int
+    - _init_worker(blocks: FrozenSet[str], validation: str, fences: Sequence[str], index: Optional[str]): void
+    - _convert_one(input_path: str, output_path: str, streaming: bool, memory_map: bool, in_place: bool): FileResult
+}
+
+Batch ..> FileResult: reports
+Batch ..> MarkdownYAMLConverter: runs one per worker process
+Batch --> ConversionCache: skips unchanged files, merges worker deltas
+Batch ..> BlockIndex: workers write block records
+
+@enduml
+"""
+
+import argparse
+import fnmatch
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, List, Optional, Sequence
+
+from fence_handlers import BUILTIN_FENCES
+from markdown_yaml_cache import ConversionCache
+from markdown_yaml_converter import VALIDATION_MODES, MarkdownYAMLConverter
+
+OUTPUT_SUFFIX = '-plantuml'
+DEFAULT_INCLUDE = ('*.md',)
+
+_converter: Optional[MarkdownYAMLConverter] = None
+
+
+@dataclass
+class FileResult:
+    """Outcome of converting a single document."""
+    input_path: str
+    output_path: str
+    seconds: float
+    error: Optional[str] = None
+    cached: bool = False
+    cache_delta: Optional[dict] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_documents(root: str, include: Sequence[str] = DEFAULT_INCLUDE,
+                   exclude: Sequence[str] = ()) -> List[str]:
+    """
+    Collects the documents under root matching the glob patterns.
+
+    Patterns are matched against the path relative to root, using '/' as
+    separator, so both 'journals/*' and '*.md' style patterns work.
+
+    Args:
+        root: Directory to search
+        include: Glob patterns a document must match at least one of
+        exclude: Glob patterns that drop a matching document
+
+    Returns:
+        Sorted list of document paths
+    """
+    documents = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if matches(root, path, include, exclude):
+                documents.append(path)
+    return sorted(documents)
+
+
+def matches(root: str, path: str, include: Sequence[str],
+            exclude: Sequence[str]) -> bool:
+    """
+    Applies the include/exclude globs to one path under root.
+
+    Args:
+        root: Directory the patterns are relative to
+        path: Candidate document path
+        include: Glob patterns a document must match at least one of
+        exclude: Glob patterns that drop a matching document
+
+    Returns:
+        True if the path is a document to convert
+    """
+    relative = os.path.relpath(path, root).replace(os.sep, '/')
+    return (any(fnmatch.fnmatch(relative, p) for p in include)
+            and not any(fnmatch.fnmatch(relative, p) for p in exclude))
+
+
+def effective_excludes(root: str, output_dir: Optional[str],
+                       include: Sequence[str],
+                       exclude: Sequence[str]) -> List[str]:
+    """
+    Extends the exclude patterns so outputs are never picked up as inputs.
+
+    Args:
+        root: Directory to convert
+        output_dir: Directory mirroring root for outputs
+        include: Glob patterns selecting documents
+        exclude: User supplied exclude patterns
+
+    Returns:
+        Exclude patterns to use
+    """
+    exclude = list(exclude)
+    if output_dir is None:
+        exclude.extend(f"{p[:-3]}{OUTPUT_SUFFIX}.md" for p in include
+                       if p.endswith('.md'))
+    else:
+        relative = os.path.relpath(output_dir, root).replace(os.sep, '/')
+        if not relative.startswith('..'):
+            exclude.append(f"{relative}/*")
+    return exclude
+
+
+def output_path_for(input_path: str, root: str,
+                    output_dir: Optional[str] = None) -> str:
+    """
+    Maps an input document to its converted output path.
+
+    Args:
+        input_path: Source markdown file path
+        root: Directory the batch was started from
+        output_dir: Directory mirroring root for outputs; next to the
+            input with an OUTPUT_SUFFIX when omitted
+
+    Returns:
+        Destination file path
+    """
+    if output_dir is None:
+        stem, ext = os.path.splitext(input_path)
+        return f"{stem}{OUTPUT_SUFFIX}{ext}"
+    return os.path.join(output_dir, os.path.relpath(input_path, root))
+
+
+def fence_languages(fences: Sequence[str]) -> List[str]:
+    """
+    Lists the fence languages a worker converter has handlers for.
+
+    Args:
+        fences: BUILTIN_FENCES languages converted besides yaml
+
+    Returns:
+        Sorted languages, as recorded with each cached file
+    """
+    return sorted({'yaml', *fences})
+
+
+def _init_worker(blocks: Optional[FrozenSet[str]] = None,
+                 validation: str = 'strict', fences: Sequence[str] = (),
+                 index: Optional[str] = None):
+    """Creates the per-process converter, seeding known-valid blocks."""
+    global _converter
+    cache = None
+    if blocks is not None:
+        cache = ConversionCache()
+        cache.blocks = set(blocks)
+    block_index = None
+    if index:
+        # sqlite3 is only loaded when an index is requested
+        from markdown_yaml_index import BlockIndex
+        block_index = BlockIndex(index)
+    _converter = MarkdownYAMLConverter(
+        cache, validation=validation,
+        fences=[BUILTIN_FENCES[language] for language in fences],
+        index=block_index)
+
+
+def _convert_one(input_path: str, output_path: str,
+                 streaming: bool = False,
+                 memory_map: bool = False,
+                 in_place: bool = False) -> FileResult:
+    """Converts one document, reusing a converter per worker process."""
+    if _converter is None:
+        _init_worker()
+
+    start = time.perf_counter()
+    error = None
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        _converter.save_converted_document(input_path, output_path,
+                                           streaming=streaming,
+                                           memory_map=memory_map,
+                                           in_place=in_place)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+
+    delta = _converter.cache.drain() if _converter.cache else None
+    return FileResult(input_path, output_path, seconds, error,
+                      cache_delta=delta)
+
+
+def convert_directory(root: str, output_dir: Optional[str] = None,
+                      include: Sequence[str] = DEFAULT_INCLUDE,
+                      exclude: Sequence[str] = (),
+                      jobs: Optional[int] = None,
+                      streaming: bool = False,
+                      on_result: Optional[Callable[[FileResult], None]] = None,
+                      cache: Optional[ConversionCache] = None,
+                      validation: str = 'strict',
+                      memory_map: bool = False,
+                      fences: Sequence[str] = (),
+                      in_place: bool = False,
+                      index: Optional[str] = None
+                      ) -> List[FileResult]:
+    """
+    Converts every matching document under root over a process pool.
+
+    Args:
+        root: Directory to convert
+        output_dir: Directory mirroring root for outputs
+        include: Glob patterns selecting documents
+        exclude: Glob patterns dropping documents
+        jobs: Worker processes; all cores when omitted, in-process when 1
+        streaming: Use the chunked streaming conversion per document
+        on_result: Called with each FileResult as it completes
+        cache: Skips documents unchanged since their last conversion and
+            YAML blocks that already validated; updated in place
+        validation: Validation mode of the workers' converters
+        memory_map: Convert each document through a memory map
+        fences: BUILTIN_FENCES languages to convert besides yaml
+        in_place: Patch only the changed regions of existing outputs
+        index: sqlite BlockIndex file the workers record each document's
+            fences in; documents that no longer exist are dropped from it
+
+    Returns:
+        FileResult per document in completion order
+    """
+    exclude = effective_excludes(root, output_dir, include, exclude)
+    results = []
+
+    def report(result: FileResult):
+        if cache and result.cache_delta:
+            cache.merge(result.cache_delta)
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    indexed = None
+    if index:
+        from markdown_yaml_index import BlockIndex
+        indexed = BlockIndex(index)
+        indexed.remove_missing()
+
+    tasks = []
+    for path in find_documents(root, include, exclude):
+        output_path = output_path_for(path, root, output_dir)
+        if (cache and cache.is_current(path, output_path, fence_languages(fences))
+                and (indexed is None or indexed.has_document(path))):
+            report(FileResult(path, output_path, 0.0, cached=True))
+        else:
+            tasks.append((path, output_path))
+    if indexed:
+        indexed.close()
+
+    jobs = jobs or os.cpu_count() or 1
+    initargs = (frozenset(cache.blocks) if cache else None, validation,
+                tuple(fences), index)
+
+    if jobs == 1 or len(tasks) <= 1:
+        _init_worker(*initargs)
+        for input_path, output_path in tasks:
+            report(_convert_one(input_path, output_path, streaming, memory_map,
+                                in_place))
+        return results
+
+    # Imported here: multiprocessing dominates the CLI's startup otherwise
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)),
+                             initializer=_init_worker,
+                             initargs=initargs) as executor:
+        futures = [executor.submit(_convert_one, input_path, output_path,
+                                   streaming, memory_map, in_place)
+                   for input_path, output_path in tasks]
+        for future in as_completed(futures):
+            report(future.result())
+    return results
+
+
+def _print_result(result: FileResult):
+    if result.cached:
+        print(f"  cached   {result.input_path}")
+    elif result.ok:
+        print(f"{result.seconds:8.3f}s  {result.input_path}")
+    else:
+        print(f"{result.seconds:8.3f}s  FAILED {result.input_path}: {result.error}",
+              file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Convert fenced YAML blocks to PlantUML across a directory.")
+    parser.add_argument('root', help="directory to convert")
+    parser.add_argument('-o', '--output-dir',
+                        help=f"mirror outputs here instead of writing *{OUTPUT_SUFFIX}.md files")
+    parser.add_argument('-i', '--include', action='append',
+                        help="glob pattern to include (repeatable, default: *.md)")
+    parser.add_argument('-x', '--exclude', action='append', default=[],
+                        help="glob pattern to exclude (repeatable)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="convert each file chunk by chunk")
+    parser.add_argument('--mmap', action='store_true',
+                        help="convert each file through a memory map (very large files)")
+    parser.add_argument('--in-place', action='store_true',
+                        help="patch only the changed regions of existing outputs")
+    parser.add_argument('--cache', metavar='MANIFEST',
+                        help="JSON manifest for incremental rebuilds")
+    parser.add_argument('--index', metavar='SQLITE',
+                        help="record block lines, hashes and top-level keys here")
+    parser.add_argument('--validation', choices=VALIDATION_MODES, default='strict',
+                        help="when to parse YAML blocks (default: strict)")
+    parser.add_argument('--fence', action='append', default=[],
+                        choices=sorted(BUILTIN_FENCES),
+                        help="also convert fences of this language (repeatable)")
+    parser.add_argument('--watch', action='store_true',
+                        help="after the initial run, reconvert files as they change")
+    parser.add_argument('--debounce', type=float, default=50,
+                        help="quiet period in ms before a burst of saves is converted")
+    parser.add_argument('--poll', action='store_true',
+                        help="watch by polling mtimes instead of inotify")
+    args = parser.parse_args(argv)
+    if args.in_place and (args.streaming or args.mmap):
+        parser.error("--in-place cannot be combined with --streaming or --mmap")
+
+    cache = ConversionCache(args.cache) if args.cache else None
+    start = time.perf_counter()
+    results = convert_directory(args.root, args.output_dir,
+                                args.include or DEFAULT_INCLUDE, args.exclude,
+                                args.jobs, args.streaming, _print_result, cache,
+                                args.validation, args.mmap, args.fence,
+                                args.in_place, args.index)
+    failed = [r for r in results if not r.ok]
+    cached = sum(r.cached for r in results)
+    print(f"{len(results) - len(failed) - cached} converted, {cached} cached, "
+          f"{len(failed)} failed in {time.perf_counter() - start:.2f}s")
+    if cache:
+        cache.save()
+        print(cache.report())
+
+    if args.watch:
+        from markdown_yaml_watch import watch_directory
+        try:
+            watch_directory(args.root, args.output_dir,
+                            args.include or DEFAULT_INCLUDE, args.exclude,
+                            args.debounce / 1000, args.poll, _print_result,
+                            cache, args.validation, fences=args.fence,
+                            index=args.index)
+        except KeyboardInterrupt:
+            pass
+        if cache:
+            cache.save()
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
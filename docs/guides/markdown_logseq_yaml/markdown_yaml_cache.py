@@ -0,0 +1,233 @@
+"""
+@startuml
+title ConversionCache Class Diagram
+
+class ConversionCache {
+    + path: Optional[str]
+    + version: str
+    + files: Dict[str, dict]
+    + blocks: Set[str]
+    + stats: Dict[str, int]
+    + __init__(path: Optional[str], version: str)
+    + {static} digest(data: bytes | str): str
+    + is_current(input_path: str, output_path: str, languages: Iterable[str]): bool
+    + {static} fingerprint(file: str | int): dict
+    + record_file(input_path: str, output_path: str, fingerprint: dict, sha256: str, languages: Iterable[str]): void
+    + has_block(digest: str): bool
+    + add_block(digest: str): void
+    + drain(): dict
+    + merge(delta: dict): void
+    + save(): void
+    + report(): str
+}
+
+note right of ConversionCache
+  JSON manifest:
+  {"version": ..., "files": {path: {size, mtime_ns, sha256, output, languages}},
+   "blocks": [sha256, ...]}
+  A version mismatch discards the whole manifest; a file converted with
+  other fence handlers registered is a miss.
+end note
+
+MarkdownYAMLConverter --> ConversionCache: skips known files and blocks
+
+@enduml
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+from markdown_yaml_converter import CONVERTER_VERSION
+
+
+class ConversionCache:
+    """Persistent content-hash cache of converted files and validated blocks."""
+
+    def __init__(self, path: Optional[str] = None,
+                 version: str = CONVERTER_VERSION):
+        """
+        Loads the manifest at path, starting empty if it is missing or stale.
+
+        Args:
+            path: JSON manifest location; in-memory only when omitted
+            version: Converter version the cached results belong to
+        """
+        self.path = path
+        self.version = version
+        self.files: Dict[str, dict] = {}
+        self.blocks: Set[str] = set()
+        self.stats = {'file_hits': 0, 'file_misses': 0,
+                      'block_hits': 0, 'block_misses': 0}
+        self._new_files: Dict[str, dict] = {}
+        self._new_blocks: List[str] = []
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+            if manifest.get('version') == version:
+                self.files = manifest.get('files', {})
+                self.blocks = set(manifest.get('blocks', ()))
+
+    @staticmethod
+    def digest(data) -> str:
+        """
+        Content hash used for files and blocks.
+
+        Args:
+            data: Bytes or text to hash
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def fingerprint(file) -> dict:
+        """
+        Size and modification time that is_current compares before hashing.
+
+        Args:
+            file: Path, or descriptor of an open file
+
+        Returns:
+            Dict with the size and mtime_ns of the file
+        """
+        stat = os.stat(file)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def is_current(self, input_path: str, output_path: str,
+                   languages: Iterable[str] = ('yaml',)) -> bool:
+        """
+        Checks whether input_path was already converted to output_path.
+
+        The size and mtime are compared first so unchanged files are not
+        re-read; the content hash settles the case where only the mtime moved.
+
+        Args:
+            input_path: Source markdown file path
+            output_path: Destination file path
+            languages: Fence languages the converter has handlers for; the
+                output of the same content differs when they change
+
+        Returns:
+            True if the cached output is still valid
+        """
+        key = os.path.abspath(input_path)
+        entry = self.files.get(key)
+        current = (entry is not None
+                   and entry.get('output') == os.path.abspath(output_path)
+                   and entry.get('languages') == sorted(languages)
+                   and os.path.exists(output_path))
+        if current:
+            fingerprint = self.fingerprint(input_path)
+            if (fingerprint['size'] != entry['size']
+                    or fingerprint['mtime_ns'] != entry['mtime_ns']):
+                with open(input_path, 'rb') as f:
+                    current = self.digest(f.read()) == entry['sha256']
+                if current:
+                    entry.update(fingerprint)
+
+        self.stats['file_hits' if current else 'file_misses'] += 1
+        return current
+
+    def record_file(self, input_path: str, output_path: str, fingerprint: dict,
+                    sha256: str, languages: Iterable[str] = ('yaml',)):
+        """
+        Records a successful conversion of input_path.
+
+        The file is not read again: it may have been saved since it was
+        converted, and its new content must not vouch for the old output.
+
+        Args:
+            input_path: Source markdown file path
+            output_path: Destination file path
+            fingerprint: fingerprint() of the input taken before it was read
+            sha256: Hex digest of the bytes that were converted
+            languages: Fence languages the converter had handlers for
+        """
+        entry = dict(fingerprint, sha256=sha256)
+        entry['output'] = os.path.abspath(output_path)
+        entry['languages'] = sorted(languages)
+        self.files[os.path.abspath(input_path)] = entry
+        self._new_files[os.path.abspath(input_path)] = entry
+
+    def has_block(self, digest: str) -> bool:
+        """
+        Checks for a block that already passed validation.
+
+        Args:
+            digest: Content hash of the YAML block
+
+        Returns:
+            True on a cache hit
+        """
+        hit = digest in self.blocks
+        self.stats['block_hits' if hit else 'block_misses'] += 1
+        return hit
+
+    def add_block(self, digest: str):
+        """
+        Records a block that passed validation.
+
+        Args:
+            digest: Content hash of the YAML block
+        """
+        if digest not in self.blocks:
+            self.blocks.add(digest)
+            self._new_blocks.append(digest)
+
+    def drain(self) -> dict:
+        """
+        Returns and resets what changed since the previous drain.
+
+        Used to ship results from worker processes back to the parent cache.
+
+        Returns:
+            Delta with the new file entries, new block digests and block stats
+        """
+        delta = {'files': self._new_files, 'blocks': self._new_blocks,
+                 'block_hits': self.stats['block_hits'],
+                 'block_misses': self.stats['block_misses']}
+        self._new_files = {}
+        self._new_blocks = []
+        self.stats = dict.fromkeys(self.stats, 0)
+        return delta
+
+    def merge(self, delta: dict):
+        """
+        Folds a delta produced by drain() on another cache into this one.
+
+        Args:
+            delta: Result of ConversionCache.drain()
+        """
+        for key, entry in delta['files'].items():
+            self.files[key] = entry
+            self._new_files[key] = entry
+        for digest in delta['blocks']:
+            self.add_block(digest)
+        self.stats['block_hits'] += delta['block_hits']
+        self.stats['block_misses'] += delta['block_misses']
+
+    def save(self):
+        """Writes the manifest atomically; no-op for in-memory caches."""
+        if not self.path:
+            return
+        manifest = {'version': self.version, 'files': self.files,
+                    'blocks': sorted(self.blocks)}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.path)
+
+    def report(self) -> str:
+        """Human readable hit/miss summary."""
+        s = self.stats
+        return (f"cache: files {s['file_hits']} hit / {s['file_misses']} miss, "
+                f"blocks {s['block_hits']} hit / {s['block_misses']} miss")
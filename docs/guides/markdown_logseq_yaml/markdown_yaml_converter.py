@@ -3,12 +3,72 @@
 title MarkdownYAMLConverter Class Diagram
 
 class MarkdownYAMLConverter {
-    - yaml_block_pattern: Pattern
-    + __init__()
+    + fence_handlers: Dict[str, FenceHandler]
+    + cache: Optional[ConversionCache]
+    + index: Optional[BlockIndex]
+    + validation_stats: Dict[str, int]
+    - _validation_cache: OrderedDict[str, Optional[str]]
+    - _loader: type
+    + validation: str
+    - _deferred: threading.local
+    - _executor: Optional[ThreadPoolExecutor]
+    + __init__(cache: Optional[ConversionCache], validation_cache_size: int, use_libyaml: bool, validation: str, validation_workers: Optional[int], fences: Iterable[FenceHandler], index: Optional[BlockIndex])
+    + register_fence_handler(handler: FenceHandler): void
+    + validate_yaml(yaml_content: str): void
+    + validate_block(content: str, handler: FenceHandler): void
+    + finish_validation(): void
+    + close(): void
+    - _deferred_state(): threading.local
+    - _deferred_scope(): ContextManager
+    - _submit_batch(): void
+    - _validate_batch(batch: List[Tuple[FenceHandler, str]]): List[ValueError]
     + extract_yaml_blocks(content: str): List[Tuple]
+    + iter_yaml_spans(content: str): Iterator[YAMLBlockSpan]
+    + extract_yaml_spans(content: str): List[YAMLBlockSpan]
+    + iter_fence_spans(content: str): Iterator[YAMLBlockSpan]
     + convert_yaml_to_plantuml(yaml_content: str): str
-    + convert_document(filepath: str): str
-    + save_converted_document(input_path: str, output_path: str): void
+    + convert_fence(handler: FenceHandler, content: str): Optional[str]
+    + convert_content(content: str, on_block: Optional[BlockCallback]): str
+    + convert_document(filepath: str, on_block: Optional[BlockCallback]): str
+    + write_document(output_path: str, content: str): void
+    + convert_stream(source: TextIO, target: TextIO, chunk_size: int, on_block: Optional[BlockCallback]): int
+    + convert_mmap(input_path: str, target: BinaryIO, on_block: Optional[BlockCallback]): int
+    + save_converted_document(input_path: str, output_path: str, streaming: bool, memory_map: bool, in_place: bool): void
+    + document_edits(input_path: str, output_path: str): List[Tuple[int, int, bytes]]
+    + document_diff(input_path: str, output_path: str, context: int): str
+    + update_converted_document(input_path: str, output_path: str, on_block: Optional[BlockCallback]): List[Tuple[int, int, bytes]]
+    - _patch_output(output_path: str, new_content: str): List[Tuple[int, int, bytes]]
+    - _convert_mapped(source: BinaryIO, target: BinaryIO, on_block: Optional[BlockCallback], sha256: Optional[hash]): int
+    + {static} compute_edits(old: bytes, new: bytes): List[Tuple[int, int, bytes]]
+    - _iter_lines(source: TextIO, chunk_size: int): Iterator[str]
+    - {static} _count_newlines(buffer: mmap, start: int, end: int): int
+    - {static} _layout(block: str, indent: int, newline: str): str
+    - {static} _open_atomic(path: str, binary: bool): ContextManager[IO]
+    - {static} _read_existing(path: str): Optional[bytes]
+    - {static} _write_at(fd: int, data: bytes, offset: int): void
+    - _parse_error(handler: FenceHandler, content: str): Optional[str]
+    - _load_yaml(yaml_content: str): object
+}
+
+class YAMLBlockSpan {
+    + source: str | bytes
+    + language: str
+    + start: int
+    + end: int
+    + content_start: int
+    + content_end: int
+    + indent: int
+    + newline: str
+    + content: str
+    + yaml_content: str
+    + pre_content: str
+    + post_content: str
+    + memoryview(): memoryview
+}
+
+class _HashingReader {
+    + sha256: hash
+    + readinto(buffer: bytearray): int
 }
 
 class "YAML Block" as YB {
@@ -31,6 +91,13 @@ note right of PB
 end note
 
 MarkdownYAMLConverter ..> YB: extracts
+MarkdownYAMLConverter ..> YAMLBlockSpan: locates
+MarkdownYAMLConverter ..> "fence_tokenizer": finds fences (CommonMark rules)
+MarkdownYAMLConverter --> ConversionCache: optional
+MarkdownYAMLConverter ..> _HashingReader: hashes the bytes it converts
+MarkdownYAMLConverter --> BlockIndex: optional, fed via on_block
+MarkdownYAMLConverter --> "*" FenceHandler: dispatches by fence language
+YAMLBlockSpan ..> YB: materialises
 MarkdownYAMLConverter ..> PB: creates
 YB ..> PB: converts to
 
@@ -38,15 +105,191 @@ YB ..> PB: converts to
 """
 
 
+import hashlib
+import io
+import mmap
+import os
 import re
-from typing import List, Tuple
-import yaml
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (IO, TYPE_CHECKING, BinaryIO, Callable, ContextManager,
+                    Dict, Iterable, Iterator, List, Optional, TextIO, Tuple)
+from fence_handlers import FenceHandler
+from fence_tokenizer import (fence_language, is_closing_fence, iter_fences,
+                             match_fence_line)
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from markdown_yaml_cache import ConversionCache
+    from markdown_yaml_index import BlockIndex
+
+# Called with (language, start_line, end_line, content) for every fence of a
+# registered language; lines are 1-based and point at the fence lines
+BlockCallback = Callable[[str, int, int, str], None]
+
+# Bump whenever the converted output changes so cached results are discarded
+CONVERTER_VERSION = '1.3'
+
+# strict: validate each block before emitting it
+# deferred: emit immediately, validate on a thread pool, raise at document end
+# off: never parse the block content
+VALIDATION_MODES = ('strict', 'deferred', 'off')
+
+# Blocks handed to the thread pool per task in deferred mode
+DEFERRED_BATCH_SIZE = 256
+
+# compute_edits compares documents this many bytes at a time before
+# narrowing down to the first differing byte
+EDIT_SCAN_CHUNK = 64 * 1024
+
+# convert_mmap counts line breaks for on_block this many bytes at a time
+MMAP_COUNT_CHUNK = 1024 * 1024
+
+# convert_mmap drops already written input pages from RSS every this many bytes
+MMAP_RELEASE_BYTES = 64 * 1024 * 1024
+
+
+class YAMLBlockSpan:
+    """Offsets of a fenced block; text is only sliced out on access."""
+
+    __slots__ = ('source', 'start', 'end', 'content_start', 'content_end',
+                 'language', 'indent', 'newline')
+
+    def __init__(self, source, start: int, end: int,
+                 content_start: int, content_end: int, language: str = 'yaml',
+                 indent: int = 0, newline: str = '\n'):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.content_start = content_start
+        self.content_end = content_end
+        self.language = language
+        self.indent = indent
+        self.newline = newline
+
+    @property
+    def content(self) -> str:
+        """The text between the fences, with '\\n' line breaks."""
+        content = self.source[self.content_start:self.content_end]
+        if not isinstance(content, str):
+            content = bytes(content).decode('utf-8')
+        if self.newline != '\n':
+            content = content.replace('\r\n', '\n')
+        if self.indent:
+            # As in CommonMark, lines lose up to the opening fence's indent
+            content = re.sub(rf'(?m)^ {{1,{self.indent}}}', '', content)
+        return content
+
+    @property
+    def yaml_content(self) -> str:
+        """The YAML text between the fences."""
+        return self.content
+
+    @property
+    def pre_content(self) -> str:
+        """Everything before the opening fence (copies on each access)."""
+        return self.source[:self.start]
+
+    @property
+    def post_content(self) -> str:
+        """Everything after the closing fence (copies on each access)."""
+        return self.source[self.end:]
+
+    def memoryview(self) -> memoryview:
+        """
+        Zero-copy view of the YAML bytes for bytes-like sources.
+
+        Unlike content, the view keeps indentation and line breaks as they
+        are in the source.
+
+        Returns:
+            memoryview over the block content
+
+        Raises:
+            TypeError: If the source is a str
+        """
+        return memoryview(self.source)[self.content_start:self.content_end]
+
+    def __repr__(self) -> str:
+        return (f"YAMLBlockSpan(language={self.language!r}, "
+                f"start={self.start}, end={self.end}, "
+                f"content_start={self.content_start}, "
+                f"content_end={self.content_end}, indent={self.indent})")
+
+
+class _HashingReader(io.RawIOBase):
+    """Binary reader that hashes everything read through it."""
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._raw.readinto(buffer)
+        if count:
+            self.sha256.update(memoryview(buffer)[:count])
+        return count
+
 
 class MarkdownYAMLConverter:
     """Converts markdown documents with YAML blocks to PlantUML-compatible format."""
 
-    def __init__(self):
-        self.yaml_block_pattern = re.compile(r'```yaml\n(.*?)\n```', re.DOTALL)
+    def __init__(self, cache: Optional['ConversionCache'] = None,
+                 validation_cache_size: int = 1024, use_libyaml: bool = True,
+                 validation: str = 'strict',
+                 validation_workers: Optional[int] = None,
+                 fences: Iterable[FenceHandler] = (),
+                 index: Optional['BlockIndex'] = None):
+        """
+        Args:
+            cache: Content-hash cache used to skip unchanged files and
+                already validated blocks (see markdown_yaml_cache)
+            validation_cache_size: Number of validation results kept in the
+                in-memory LRU cache; 0 disables it
+            use_libyaml: Validate with the libyaml-backed CSafeLoader when
+                PyYAML was built with it, falling back to SafeLoader
+            validation: One of VALIDATION_MODES
+            validation_workers: Thread pool size for deferred validation
+            fences: Handlers for fence languages besides yaml, e.g. from
+                fence_handlers.BUILTIN_FENCES
+            index: Block index that save_converted_document updates with
+                the fences of each saved document (see markdown_yaml_index)
+        """
+        if validation not in VALIDATION_MODES:
+            raise ValueError(f"Unknown validation mode: {validation!r}")
+        self.cache = cache
+        self.index = index
+        self.validation_cache_size = validation_cache_size
+        self.validation_stats = {'hits': 0, 'misses': 0}
+        self._validation_cache: 'OrderedDict[str, Optional[str]]' = OrderedDict()
+        self.use_libyaml = use_libyaml
+        self._loader: Optional[type] = None
+        self.validation = validation
+        self.validation_workers = validation_workers
+        self._lock = threading.Lock()
+        # Deferred blocks and their futures, per converting thread
+        self._deferred = threading.local()
+        self._executor: Optional['ThreadPoolExecutor'] = None
+
+        self.fence_handlers: Dict[str, FenceHandler] = {}
+        self.register_fence_handler(
+            FenceHandler('yaml', '@startyaml', '@endyaml', parse=self._load_yaml))
+        for handler in fences:
+            self.register_fence_handler(handler)
+
+    def register_fence_handler(self, handler: FenceHandler):
+        """
+        Adds or replaces the handler for a fence language.
+
+        Args:
+            handler: Handler for handler.language fences
+        """
+        self.fence_handlers[handler.language] = handler
 
     def extract_yaml_blocks(self, content: str) -> List[Tuple[str, str, str]]:
         """
@@ -58,42 +301,265 @@ class MarkdownYAMLConverter:
         Returns:
             List of tuples containing (pre_content, yaml_block, post_content)
         """
-        positions = []
-        for match in self.yaml_block_pattern.finditer(content):
-            start, end = match.span()
-            yaml_content = match.group(1)
-            positions.append((
-                content[:start],
-                yaml_content,
-                content[end:]
-            ))
-        return positions
+        return [(span.pre_content, span.yaml_content, span.post_content)
+                for span in self.iter_yaml_spans(content)]
+
+    def iter_yaml_spans(self, content) -> Iterator[YAMLBlockSpan]:
+        """
+        Locates YAML blocks without copying the surrounding document.
+
+        Args:
+            content: The markdown document content, as str or as a UTF-8
+                bytes-like object such as an mmap
+
+        Returns:
+            Iterator of YAMLBlockSpan records in document order
+        """
+        for span in self._iter_spans(content):
+            if span.language == 'yaml':
+                yield span
+
+    def iter_fence_spans(self, content) -> Iterator[YAMLBlockSpan]:
+        """
+        Locates the fences of every registered language in one pass.
+
+        Fences follow the CommonMark rules (see fence_tokenizer): backtick
+        or tilde runs, up to three spaces of indentation, CRLF line breaks.
+        A fence of another language hides the fences inside it. The scan is
+        linear in the document size, including for unterminated fences.
+
+        Args:
+            content: The markdown document content, as str or as a UTF-8
+                bytes-like object such as an mmap
+
+        Returns:
+            Iterator of YAMLBlockSpan records, with language set, in
+            document order
+        """
+        for span in self._iter_spans(content):
+            if span.language in self.fence_handlers:
+                yield span
+
+    @staticmethod
+    def _iter_spans(content) -> Iterator[YAMLBlockSpan]:
+        for fence in iter_fences(content):
+            yield YAMLBlockSpan(content, *fence)
+
+    def extract_yaml_spans(self, content: str) -> List[YAMLBlockSpan]:
+        """
+        Span-based counterpart of extract_yaml_blocks.
+
+        Args:
+            content: The markdown document content
+
+        Returns:
+            List of YAMLBlockSpan records in document order
+        """
+        return list(self.iter_yaml_spans(content))
 
     def convert_yaml_to_plantuml(self, yaml_content: str) -> str:
         """
         Converts YAML content to PlantUML format.
 
+        In deferred mode a ValueError for invalid content is raised by
+        finish_validation() instead.
+
         Args:
             yaml_content: The YAML block content
 
         Returns:
             PlantUML-formatted YAML content
         """
-        # Validate YAML first
+        return self.convert_fence(self.fence_handlers['yaml'], yaml_content)
+
+    def convert_fence(self, handler: FenceHandler, content: str) -> Optional[str]:
+        """
+        Validates (per the validation mode) and renders one fence body.
+
+        Args:
+            handler: Handler of the fence language
+            content: The fence body
+
+        Returns:
+            PlantUML block, or None if the fence should be left unchanged
+        """
+        if handler.parse is not None:
+            if self.validation == 'strict':
+                self.validate_block(content, handler)
+            elif self.validation == 'deferred':
+                batch = self._deferred_state().batch
+                batch.append((handler, content))
+                if len(batch) >= DEFERRED_BATCH_SIZE:
+                    self._submit_batch()
+
+        return handler.to_plantuml(content)
+
+    def validate_yaml(self, yaml_content: str):
+        """
+        Validates a YAML block, memoizing the outcome by content hash.
+
+        Args:
+            yaml_content: The YAML block content
+
+        Raises:
+            ValueError: If the content is not valid YAML
+        """
+        self.validate_block(yaml_content, self.fence_handlers['yaml'])
+
+    def validate_block(self, content: str, handler: FenceHandler):
+        """
+        Validates a fence body with its handler's parser.
+
+        Results, including failures, are kept in a bounded LRU cache keyed
+        by language and content hash, so repeated snippets are parsed once;
+        the persistent cache, if any, is consulted before parsing.
+
+        Args:
+            content: The fence body
+            handler: Handler of the fence language
+
+        Raises:
+            ValueError: If the content does not parse
+        """
+        digest = hashlib.sha256(
+            f"{handler.language}\0{content}".encode('utf-8')).hexdigest()
+
+        with self._lock:
+            cached = digest in self._validation_cache
+            if cached:
+                self._validation_cache.move_to_end(digest)
+                self.validation_stats['hits'] += 1
+                error = self._validation_cache[digest]
+            else:
+                self.validation_stats['misses'] += 1
+                known = self.cache is not None and self.cache.has_block(digest)
+
+        if not cached:
+            # Parse outside the lock so deferred validations overlap
+            error = None if known else self._parse_error(handler, content)
+            with self._lock:
+                if error is None and self.cache and not known:
+                    self.cache.add_block(digest)
+                if self.validation_cache_size > 0:
+                    self._validation_cache[digest] = error
+                    if len(self._validation_cache) > self.validation_cache_size:
+                        self._validation_cache.popitem(last=False)
+
+        if error is not None:
+            raise ValueError(f"Invalid {handler.language.upper()} content: {error}")
+
+    def finish_validation(self):
+        """
+        Waits for deferred validations this thread submitted since the last call.
+
+        Raises:
+            ValueError: If any of the deferred blocks does not parse
+        """
+        state = self._deferred_state()
+        if state.batch:
+            self._submit_batch()
+        pending, state.pending = state.pending, []
+        errors = [e for f in pending for e in f.result()]
+        if len(errors) == 1:
+            raise errors[0]
+        if errors:
+            raise ValueError(f"{len(errors)} invalid blocks, first: {errors[0]}")
+
+    def _deferred_state(self) -> threading.local:
+        state = self._deferred
+        if not hasattr(state, 'batch'):
+            state.batch = []
+            state.pending = []
+        return state
+
+    @contextmanager
+    def _deferred_scope(self) -> Iterator[None]:
+        """
+        Discards the deferred validations of a conversion that fails.
+
+        Otherwise the next document converted on this thread would report
+        the failed document's invalid blocks.
+        """
         try:
-            yaml.safe_load(yaml_content)
-        except yaml.YAMLError as e:
-            raise ValueError(f"Invalid YAML content: {e}")
+            yield
+        except BaseException:
+            state = self._deferred_state()
+            for future in state.pending:
+                future.cancel()
+            state.batch, state.pending = [], []
+            raise
+
+    def _submit_batch(self):
+        with self._lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(self.validation_workers)
+        state = self._deferred_state()
+        batch, state.batch = state.batch, []
+        state.pending.append(self._executor.submit(self._validate_batch, batch))
+
+    def _validate_batch(self, batch: List[Tuple[FenceHandler, str]]) -> List[ValueError]:
+        """
+        Validates a batch of deferred blocks.
+
+        Args:
+            batch: (handler, fence body) pairs
+
+        Returns:
+            The errors of the invalid blocks
+        """
+        errors = []
+        for handler, content in batch:
+            try:
+                self.validate_block(content, handler)
+            except ValueError as e:
+                errors.append(e)
+        return errors
+
+    def close(self):
+        """Shuts down the deferred validation thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _parse_error(self, handler: FenceHandler, content: str) -> Optional[str]:
+        """
+        Parses a fence body and reports why it is invalid.
+
+        Args:
+            handler: Handler of the fence language
+            content: The fence body
+
+        Returns:
+            The parser error message, or None if it parsed
+        """
+        try:
+            handler.parse(content)
+        except ValueError as e:
+            return str(e)
+        return None
 
-        # Format for PlantUML
-        return f"@startyaml\n{yaml_content}\n@endyaml"
+    def _load_yaml(self, yaml_content: str):
+        # PyYAML is imported on first parse, so runs that never validate
+        # (validation='off', block listing) do not pay for it
+        import yaml
+        if self._loader is None:
+            self._loader = yaml.SafeLoader
+            if self.use_libyaml:
+                self._loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        try:
+            return yaml.load(yaml_content, Loader=self._loader)
+        except yaml.YAMLError as e:
+            raise ValueError(str(e)) from e
 
-    def convert_document(self, filepath: str) -> str:
+    def convert_document(self, filepath: str,
+                         on_block: Optional[BlockCallback] = None) -> str:
         """
         Converts entire document to PlantUML-compatible format.
 
         Args:
             filepath: Path to the markdown document
+            on_block: Called for each fence found (see BlockCallback)
 
         Returns:
             Converted document content
@@ -101,30 +567,560 @@ class MarkdownYAMLConverter:
         with open(filepath, 'r') as f:
             content = f.read()
 
-        # Process each YAML block
-        blocks = self.extract_yaml_blocks(content)
-        converted_content = content
+        return self.convert_content(content, on_block)
 
-        for pre, yaml_block, post in blocks:
-            plantuml_block = self.convert_yaml_to_plantuml(yaml_block)
-            converted_content = converted_content.replace(
-                f"```yaml\n{yaml_block}\n```",
-                plantuml_block
-            )
+    def convert_content(self, content: str,
+                        on_block: Optional[BlockCallback] = None) -> str:
+        """
+        Converts markdown content already held in memory.
 
-        return converted_content
+        Args:
+            content: The markdown document content
+            on_block: Called for each fence found (see BlockCallback)
 
-    def save_converted_document(self, input_path: str, output_path: str):
+        Returns:
+            Converted document content
+        """
+        with self._deferred_scope():
+            # Rebuild the document in a single pass over the fence matches
+            parts = []
+            last = 0
+            line = 1
+            counted = 0
+            for span in self.iter_fence_spans(content):
+                body = span.content
+                if on_block is not None:
+                    line += content.count('\n', counted, span.start)
+                    counted = span.start
+                    on_block(span.language, line,
+                             line + content.count('\n', span.start, span.end), body)
+                block = self.convert_fence(self.fence_handlers[span.language], body)
+                if block is None:
+                    continue
+                parts.append(content[last:span.start])
+                parts.append(self._layout(block, span.indent, span.newline))
+                last = span.end
+            parts.append(content[last:])
+            self.finish_validation()
+
+            return ''.join(parts)
+
+    def convert_stream(self, source: TextIO, target: TextIO,
+                       chunk_size: int = 1 << 16,
+                       on_block: Optional[BlockCallback] = None) -> int:
+        """
+        Converts a markdown stream, writing output as each fence closes.
+
+        Only the lines of the currently open fence are held in memory, so
+        memory use stays flat regardless of the document size.
+
+        Args:
+            source: Readable text handle with the markdown content
+            target: Writable text handle for the converted content
+            chunk_size: Number of characters read from source at a time
+            on_block: Called for each fence found (see BlockCallback)
+
+        Returns:
+            Number of converted blocks
+        """
+        with self._deferred_scope():
+            converted = 0
+            handler = None
+            opening_run = None
+            block_lines = None
+
+            for number, line in enumerate(self._iter_lines(source, chunk_size), 1):
+                if opening_run is None:
+                    fence = match_fence_line(line)
+                    if fence is None or not line.endswith('\n'):
+                        target.write(line)
+                        continue
+                    indent, opening_run, info = fence
+                    opening = line
+                    opening_number = number
+                    handler = self.fence_handlers.get(fence_language(info))
+                    if handler is not None:
+                        block_lines = []
+                    else:
+                        # Foreign fences pass through, hiding the fences inside
+                        target.write(line)
+                elif not is_closing_fence(line, opening_run):
+                    if block_lines is None:
+                        target.write(line)
+                    else:
+                        block_lines.append(line)
+                elif block_lines is None:
+                    target.write(line)
+                    opening_run = None
+                else:
+                    lines = ''.join(block_lines)
+                    # Without the line break that ends the last content line
+                    end = len(lines) - (2 if lines.endswith('\r\n') else 1 if lines else 0)
+                    newline = '\r\n' if opening.endswith('\r\n') else '\n'
+                    body = YAMLBlockSpan(lines, 0, 0, 0, end, handler.language,
+                                         indent, newline).content
+                    if on_block is not None:
+                        on_block(handler.language, opening_number, number, body)
+                    block = self.convert_fence(handler, body)
+                    if block is None:
+                        target.write(opening)
+                        target.writelines(block_lines)
+                        target.write(line)
+                    else:
+                        target.write(opening[:indent])
+                        target.write(self._layout(block, indent, newline))
+                        # Keep what follows the closing run, as convert_content does
+                        target.write(line.lstrip(' ').lstrip(opening_run[0]))
+                        converted += 1
+                    handler = opening_run = block_lines = None
+
+            # An unterminated fence is passed through unchanged
+            if block_lines is not None:
+                target.write(opening)
+                target.writelines(block_lines)
+
+            self.finish_validation()
+            return converted
+
+    @staticmethod
+    def _layout(block: str, indent: int, newline: str) -> str:
+        """
+        Gives a converted block the indentation and line breaks of its fence.
+
+        Args:
+            block: Rendered block with '\\n' line breaks
+            indent: Spaces before the opening fence
+            newline: Line break of the opening fence line
+
+        Returns:
+            The block as it is written to the output
+        """
+        if indent or newline != '\n':
+            return block.replace('\n', newline + ' ' * indent)
+        return block
+
+    @staticmethod
+    def _iter_lines(source: TextIO, chunk_size: int) -> Iterator[str]:
+        """
+        Yields lines, including their line endings, from fixed-size reads.
+
+        Args:
+            source: Readable text handle
+            chunk_size: Number of characters read at a time
+
+        Returns:
+            Iterator over the lines of the source
+        """
+        # Pieces of an unfinished line; only each new chunk is searched, so
+        # a line spanning many chunks costs time linear in its length
+        pending = []
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            start = 0
+            newline = chunk.find('\n')
+            while newline != -1:
+                if pending:
+                    pending.append(chunk[start:newline + 1])
+                    yield ''.join(pending)
+                    pending = []
+                else:
+                    yield chunk[start:newline + 1]
+                start = newline + 1
+                newline = chunk.find('\n', start)
+            if start < len(chunk):
+                pending.append(chunk[start:])
+        if pending:
+            yield ''.join(pending)
+
+    @staticmethod
+    def _count_newlines(buffer, start: int, end: int) -> int:
+        """
+        Counts line breaks in buffer[start:end] without copying it whole.
+
+        Args:
+            buffer: Bytes-like object supporting slicing, such as an mmap
+            start: First byte position
+            end: Byte position after the last one
+
+        Returns:
+            Number of line feed bytes in the range
+        """
+        count = 0
+        for offset in range(start, end, MMAP_COUNT_CHUNK):
+            count += buffer[offset:min(offset + MMAP_COUNT_CHUNK, end)].count(b'\n')
+        return count
+
+    def convert_mmap(self, input_path: str, target: BinaryIO,
+                     on_block: Optional[BlockCallback] = None) -> int:
+        """
+        Converts a UTF-8 document through a read-only memory map.
+
+        The fence tokenizer runs over the mapped bytes and output is written
+        incrementally, with unchanged regions passed as memoryviews of the
+        map. Pages already written out are periodically dropped from the
+        process, so peak RSS does not grow with the input size. Line endings
+        are kept byte for byte.
+
+        Args:
+            input_path: Source markdown file path
+            target: Writable binary handle for the converted content
+            on_block: Called for each fence found (see BlockCallback)
+
+        Returns:
+            Number of converted blocks
+        """
+        with open(input_path, 'rb') as f:
+            return self._convert_mapped(f, target, on_block)
+
+    def _convert_mapped(self, source: BinaryIO, target: BinaryIO,
+                        on_block: Optional[BlockCallback] = None,
+                        sha256=None) -> int:
+        """
+        Converts an open file through a read-only memory map of it.
+
+        Args:
+            source: Binary handle of the markdown file
+            target: Writable binary handle for the converted content
+            on_block: Called for each fence found (see BlockCallback)
+            sha256: hashlib object fed the mapped bytes as they are converted
+
+        Returns:
+            Number of converted blocks
+        """
+        with self._deferred_scope():
+            converted = 0
+            if os.fstat(source.fileno()).st_size == 0:
+                return 0
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(mm)
+                try:
+                    last = 0
+                    hashed = 0
+                    released = 0
+                    line = 1
+                    counted = 0
+                    for span in self.iter_fence_spans(mm):
+                        body = span.content
+                        if sha256 is not None:
+                            sha256.update(view[hashed:span.end])
+                            hashed = span.end
+                        if on_block is not None:
+                            line += self._count_newlines(mm, counted, span.start)
+                            counted = span.start
+                            on_block(span.language, line, line + self._count_newlines(
+                                mm, span.start, span.end), body)
+                        block = self.convert_fence(
+                            self.fence_handlers[span.language], body)
+                        if block is None:
+                            continue
+                        target.write(view[last:span.start])
+                        block = self._layout(block, span.indent, span.newline)
+                        target.write(block.encode('utf-8'))
+                        last = span.end
+                        converted += 1
+
+                        if last - released >= MMAP_RELEASE_BYTES and hasattr(mm, 'madvise'):
+                            release_to = last - last % mmap.PAGESIZE
+                            mm.madvise(mmap.MADV_DONTNEED, 0, release_to)
+                            released = release_to
+                    target.write(view[last:])
+                    if sha256 is not None:
+                        sha256.update(view[hashed:])
+                finally:
+                    view.release()
+
+            self.finish_validation()
+            return converted
+
+    def save_converted_document(self, input_path: str, output_path: str,
+                                streaming: bool = False,
+                                memory_map: bool = False,
+                                in_place: bool = False):
         """
         Converts and saves document with preserved formatting.
 
+        The output is written to a temporary file next to output_path and
+        renamed over it, so readers never observe a partially written file
+        and a failed conversion leaves the previous output in place. With a
+        cache, a document whose content is unchanged since its last
+        conversion to output_path is skipped.
+
         Args:
             input_path: Source markdown file path
             output_path: Destination file path
+            streaming: Convert chunk by chunk instead of loading the whole file
+            memory_map: Convert through a memory map of the input, for very
+                large files (see convert_mmap)
+            in_place: Rewrite only the changed regions of an existing output
+                instead of replacing it (see update_converted_document)
+
+        Raises:
+            ValueError: If in_place is combined with streaming or memory_map
+        """
+        if in_place and (streaming or memory_map):
+            raise ValueError("in_place cannot be combined with streaming "
+                             "or memory_map")
+        if (self.cache and self.cache.is_current(input_path, output_path,
+                                                 self.fence_handlers)
+                and (self.index is None or self.index.has_document(input_path))):
+            return
+
+        records = None
+        on_block: Optional[BlockCallback] = None
+        if self.index is not None:
+            # Only the hash and keys of each fence are kept, not its body
+            records = []
+
+            def record_block(language, start_line, end_line, content):
+                records.append(self.index.block_record(language, start_line,
+                                                       end_line, content))
+
+            on_block = record_block
+
+        # The cache entry describes the bytes actually converted: the input
+        # may be saved again while it is converted (e.g. under --watch)
+        with open(input_path, 'rb') as raw:
+            fingerprint = self.cache.fingerprint(raw.fileno()) if self.cache else None
+            reader = _HashingReader(raw)
+            if memory_map:
+                with self._open_atomic(output_path, binary=True) as target:
+                    self._convert_mapped(raw, target, on_block, reader.sha256)
+            else:
+                # Decoded as open(input_path, 'r') would
+                source = io.TextIOWrapper(io.BufferedReader(reader))
+                if streaming:
+                    with self._open_atomic(output_path) as target:
+                        self.convert_stream(source, target, on_block=on_block)
+                elif in_place:
+                    self._patch_output(output_path,
+                                       self.convert_content(source.read(), on_block))
+                else:
+                    self.write_document(output_path,
+                                        self.convert_content(source.read(), on_block))
+
+        if records is not None:
+            self.index.record_document(input_path, records)
+        # Unvalidated output must not satisfy a later validating run
+        if self.cache and self.validation != 'off':
+            self.cache.record_file(input_path, output_path, fingerprint,
+                                   reader.sha256.hexdigest(), self.fence_handlers)
+
+    def write_document(self, output_path: str, content: str):
         """
-        converted = self.convert_document(input_path)
-        with open(output_path, 'w') as f:
-            f.write(converted)
+        Atomically replaces output_path with content.
+
+        Args:
+            output_path: Destination file path
+            content: Converted document content
+        """
+        with self._open_atomic(output_path) as f:
+            f.write(content)
+
+    def document_edits(self, input_path: str,
+                       output_path: str) -> List[Tuple[int, int, bytes]]:
+        """
+        Lists the changes that bring output_path up to date with input_path.
+
+        Args:
+            input_path: Source markdown file path
+            output_path: Previously converted file path; treated as empty
+                if it does not exist
+
+        Returns:
+            (offset, length, replacement) edits, see compute_edits
+        """
+        old = self._read_existing(output_path) or b''
+        new = self.convert_document(input_path).encode('utf-8')
+        return self.compute_edits(old, new)
+
+    def document_diff(self, input_path: str, output_path: str,
+                      context: int = 3) -> str:
+        """
+        Renders the pending changes to output_path as a unified diff.
+
+        Args:
+            input_path: Source markdown file path
+            output_path: Previously converted file path; treated as empty
+                if it does not exist
+            context: Unchanged lines shown around each hunk
+
+        Returns:
+            Unified diff text, empty when the output is current
+        """
+        import difflib
+        old = (self._read_existing(output_path) or b'').decode('utf-8')
+        new = self.convert_document(input_path)
+        return ''.join(difflib.unified_diff(
+            old.splitlines(keepends=True), new.splitlines(keepends=True),
+            fromfile=output_path, tofile=output_path, n=context))
+
+    def update_converted_document(self, input_path: str, output_path: str,
+                                  on_block: Optional[BlockCallback] = None
+                                  ) -> List[Tuple[int, int, bytes]]:
+        """
+        Converts a document and patches only the changed regions of its output.
+
+        Edits that keep their length are written in place with pwrite. The
+        first edit that changes the length shifts everything after it, so
+        the output is rewritten from there on and truncated. Unlike
+        save_converted_document this is not atomic: a reader may observe a
+        partially updated file. A missing output is written atomically.
+
+        Args:
+            input_path: Source markdown file path
+            output_path: Previously converted file path
+            on_block: Called for each fence found (see BlockCallback)
+
+        Returns:
+            The applied (offset, length, replacement) edits
+        """
+        return self._patch_output(output_path,
+                                  self.convert_document(input_path, on_block))
+
+    def _patch_output(self, output_path: str,
+                      new_content: str) -> List[Tuple[int, int, bytes]]:
+        """
+        Patches output_path to new_content (see update_converted_document).
+
+        Args:
+            output_path: Previously converted file path
+            new_content: Converted document content
+
+        Returns:
+            The applied (offset, length, replacement) edits
+        """
+        old = self._read_existing(output_path)
+        new = new_content.encode('utf-8')
+        if old is None:
+            self.write_document(output_path, new_content)
+            return [(0, 0, new)]
+
+        edits = self.compute_edits(old, new)
+        if not edits:
+            return edits
+
+        fd = os.open(output_path, os.O_WRONLY)
+        try:
+            for offset, length, replacement in edits:
+                if len(replacement) != length:
+                    # Offsets are unchanged up to the first resizing edit
+                    self._write_at(fd, new[offset:], offset)
+                    os.ftruncate(fd, len(new))
+                    break
+                self._write_at(fd, replacement, offset)
+        finally:
+            os.close(fd)
+        return edits
+
+    @staticmethod
+    def compute_edits(old: bytes, new: bytes) -> List[Tuple[int, int, bytes]]:
+        """
+        Computes the line-level edits that turn old into new.
+
+        The common prefix and suffix are skipped with chunked comparisons,
+        so only the changed middle of a large document is diffed line by
+        line.
+
+        Args:
+            old: Current content
+            new: Desired content
+
+        Returns:
+            (offset, length, replacement) edits in ascending offset order;
+            offset and length are byte positions in old. Applying them from
+            the last to the first yields new.
+        """
+        if old == new:
+            return []
+        import difflib
+
+        limit = min(len(old), len(new))
+        prefix = 0
+        while (prefix < limit and old[prefix:prefix + EDIT_SCAN_CHUNK]
+               == new[prefix:prefix + EDIT_SCAN_CHUNK]):
+            prefix += EDIT_SCAN_CHUNK
+        prefix = min(prefix, limit)
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        # Diff whole lines: back up to the start of the first changed line
+        prefix = old.rfind(b'\n', 0, prefix) + 1
+
+        old_end, new_end = len(old), len(new)
+        limit -= prefix
+        while limit:
+            step = min(EDIT_SCAN_CHUNK, limit)
+            if old[old_end - step:old_end] != new[new_end - step:new_end]:
+                break
+            old_end, new_end, limit = old_end - step, new_end - step, limit - step
+        while limit and old[old_end - 1] == new[new_end - 1]:
+            old_end, new_end, limit = old_end - 1, new_end - 1, limit - 1
+        while old_end < len(old) and old_end > prefix and old[old_end - 1] != 0x0A:
+            old_end, new_end = old_end + 1, new_end + 1
+
+        old_lines = old[prefix:old_end].splitlines(keepends=True)
+        new_lines = new[prefix:new_end].splitlines(keepends=True)
+        old_offsets = [prefix]
+        for line in old_lines:
+            old_offsets.append(old_offsets[-1] + len(line))
+
+        edits = []
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                edits.append((old_offsets[i1], old_offsets[i2] - old_offsets[i1],
+                              b''.join(new_lines[j1:j2])))
+        return edits
+
+    @staticmethod
+    def _read_existing(path: str) -> Optional[bytes]:
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write_at(fd: int, data: bytes, offset: int):
+        """
+        Writes all of data at offset without moving the file position.
+
+        Args:
+            fd: File descriptor open for writing
+            data: Bytes to write
+            offset: Byte position in the file
+        """
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+
+    @staticmethod
+    @contextmanager
+    def _open_atomic(path: str, binary: bool = False) -> ContextManager[IO]:
+        """
+        Opens a temporary sibling of path that replaces it on success.
+
+        Args:
+            path: Destination file path
+            binary: Open the handle in binary instead of text mode
+
+        Returns:
+            Context manager yielding a writable handle
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb' if binary else 'w') as f:
+                yield f
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
 
 if __name__ == "__main__":
@@ -0,0 +1,352 @@
+"""
+@startuml
+title MarkdownYAMLDaemon Class Diagram
+
+class ConverterDaemon {
+    + socket_path: str
+    + converter: MarkdownYAMLConverter
+    + workers: int
+    + methods: Dict[str, Callable]
+    - _listener: Optional[socket]
+    - _executor: ThreadPoolExecutor
+    - _stopped: Event
+    - _connections: Set[socket]
+    + __init__(socket_path: str, converter: Optional[MarkdownYAMLConverter], workers: int)
+    + serve_forever(): void
+    + shutdown(): void
+    + handle_request(request: dict): dict
+    - _handle_connection(conn: socket): void
+    - _document_edits(input_path: str, output_path: str): List[List]
+    - _stats(): dict
+}
+
+class DaemonClient {
+    + socket_path: str
+    - _sock: socket
+    - _reader: BinaryIO
+    - _next_id: int
+    + __init__(socket_path: str, timeout: Optional[float])
+    + call(method: str, **params): Any
+    + close(): void
+}
+
+class DaemonError {
+}
+
+class "markdown_yaml_daemon" as DaemonModule {
+    + DEFAULT_SOCKET: str
+    + check_socket_directory(socket_path: str, create: bool): void
+    + main(argv: Optional[List[str]]): int
+}
+
+note right of ConverterDaemon
+  One JSON object per line in each direction:
+  {"id": 1, "method": "convert_content", "params": {"content": "..."}}
+  {"id": 1, "result": "..."}  or  {"id": 1, "error": "ValueError: ..."}
+end note
+
+ConverterDaemon --> MarkdownYAMLConverter: keeps warm, shared by all connections
+DaemonClient ..> ConverterDaemon: JSON lines over a Unix socket
+DaemonClient ..> DaemonError: raises
+ConverterDaemon ..> DaemonModule: binds inside a private directory
+DaemonClient ..> DaemonModule: connects only through a private directory
+
+@enduml
+"""
+
+import argparse
+import json
+import os
+import socket
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from fence_handlers import BUILTIN_FENCES
+from markdown_yaml_converter import VALIDATION_MODES, MarkdownYAMLConverter
+
+_UID = os.getuid() if hasattr(os, 'getuid') else 0
+# $XDG_RUNTIME_DIR is private to the user. Without it the socket goes in a
+# 0700 directory of our own, not directly in /tmp where another user could
+# bind the path first and receive the documents sent by clients.
+DEFAULT_SOCKET = os.path.join(
+    os.environ.get('XDG_RUNTIME_DIR') or f"/tmp/markdown-yaml-converter-{_UID}",
+    f"markdown-yaml-converter-{_UID}.sock")
+
+
+def check_socket_directory(socket_path: str, create: bool = False):
+    """
+    Ensures no other user can add or replace entries next to socket_path.
+
+    Args:
+        socket_path: Filesystem path of the daemon socket
+        create: Create the directory with mode 0700 if it is missing
+
+    Raises:
+        OSError: If the directory is missing, is not a real directory owned
+            by the current user, or is writable by group or others
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    if create:
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+    info = os.lstat(directory)
+    if (not stat.S_ISDIR(info.st_mode) or info.st_uid != _UID
+            or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise OSError(f"{directory} must be a directory owned by the current "
+                      "user and not writable by others")
+
+
+class DaemonError(Exception):
+    """Error reported by the daemon for a request."""
+
+
+class ConverterDaemon:
+    """Serves conversions over a Unix socket from one warm converter."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET,
+                 converter: Optional[MarkdownYAMLConverter] = None,
+                 workers: int = 8):
+        """
+        Args:
+            socket_path: Filesystem path of the listening socket
+            converter: Converter shared by all requests; a default one when
+                omitted
+            workers: Connections served at the same time
+        """
+        self.socket_path = socket_path
+        self.converter = converter or MarkdownYAMLConverter()
+        self.workers = workers
+        self._listener: Optional[socket.socket] = None
+        self._executor = ThreadPoolExecutor(workers)
+        self._stopped = threading.Event()
+        self._connections: Set[socket.socket] = set()
+        self._lock = threading.Lock()
+        self.methods: Dict[str, Callable] = {
+            'ping': lambda: 'pong',
+            'convert_content': self.converter.convert_content,
+            'convert_document': self.converter.convert_document,
+            'save_converted_document': self.converter.save_converted_document,
+            'document_edits': self._document_edits,
+            'document_diff': self.converter.document_diff,
+            'stats': self._stats,
+            'shutdown': self.shutdown,
+        }
+
+    def serve_forever(self):
+        """
+        Accepts connections until shutdown() is called.
+
+        Raises:
+            OSError: If another daemon is already listening on socket_path,
+                socket_path exists and is not a socket, or its directory is
+                not private (see check_socket_directory)
+        """
+        check_socket_directory(self.socket_path, create=True)
+        if os.path.lexists(self.socket_path):
+            if not stat.S_ISSOCK(os.lstat(self.socket_path).st_mode):
+                raise OSError(f"{self.socket_path} exists and is not a socket")
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise OSError(f"A daemon is already listening on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a daemon that did not shut down cleanly
+                os.remove(self.socket_path)
+            finally:
+                probe.close()
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Created 0600: no other user may connect, not even before a chmod
+        umask = os.umask(0o177)
+        try:
+            self._listener.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        self._listener.listen()
+        self._listener.settimeout(0.5)
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn, _ = self._listener.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                with self._lock:
+                    self._connections.add(conn)
+                self._executor.submit(self._handle_connection, conn)
+        finally:
+            self._listener.close()
+            with self._lock:
+                # Wake up handlers blocked reading from idle clients
+                for conn in self._connections:
+                    try:
+                        conn.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self._executor.shutdown()
+            self.converter.close()
+
+    def shutdown(self):
+        """Stops the daemon; requests in progress are answered first."""
+        self._stopped.set()
+
+    def _handle_connection(self, conn: socket.socket):
+        """
+        Answers the requests of one connection in order.
+
+        Connections beyond `workers` wait in the executor queue until a
+        thread frees up.
+
+        Args:
+            conn: Accepted client socket
+        """
+        try:
+            with conn, conn.makefile('rb') as reader, conn.makefile('wb') as writer:
+                for line in reader:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        response = {'id': None, 'error': f"Malformed request: {e}"}
+                    else:
+                        response = self.handle_request(request)
+                    writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                    writer.flush()
+                    if self._stopped.is_set():
+                        break
+        except OSError:
+            # The client went away, or the daemon is shutting down
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(conn)
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Runs one decoded request.
+
+        Args:
+            request: Object with a method name, optional params and id
+
+        Returns:
+            Response object with the request id and a result or an error
+        """
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            method = self.methods.get(request.get('method'))
+            if method is None:
+                raise ValueError(f"Unknown method: {request.get('method')!r}")
+            result = method(**request.get('params', {}))
+        except Exception as e:
+            return {'id': request_id, 'error': f"{type(e).__name__}: {e}"}
+        return {'id': request_id, 'result': result}
+
+    def _document_edits(self, input_path: str,
+                        output_path: str) -> List[List]:
+        # Edits cover whole lines of UTF-8 output, so the bytes decode
+        return [[offset, length, replacement.decode('utf-8')]
+                for offset, length, replacement
+                in self.converter.document_edits(input_path, output_path)]
+
+    def _stats(self) -> dict:
+        stats = {'validation': dict(self.converter.validation_stats),
+                 'validation_cache_size': len(self.converter._validation_cache)}
+        if self.converter.cache:
+            stats['cache'] = dict(self.converter.cache.stats)
+        return stats
+
+
+class DaemonClient:
+    """Minimal client for ConverterDaemon, one request at a time."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET,
+                 timeout: Optional[float] = None):
+        """
+        Args:
+            socket_path: Filesystem path of the daemon socket
+            timeout: Seconds to wait for a response; forever when None
+
+        Raises:
+            OSError: If no daemon is listening, or the socket directory is
+                not private (see check_socket_directory)
+        """
+        self.socket_path = socket_path
+        check_socket_directory(socket_path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(socket_path)
+        self._reader = self._sock.makefile('rb')
+        self._next_id = 0
+
+    def call(self, method: str, **params) -> Any:
+        """
+        Sends a request and waits for its response.
+
+        Args:
+            method: Daemon method name, e.g. 'convert_content'
+            **params: Keyword arguments of the method
+
+        Returns:
+            The method's result
+
+        Raises:
+            DaemonError: If the daemon reports an error
+        """
+        self._next_id += 1
+        request = {'id': self._next_id, 'method': method, 'params': params}
+        self._sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        line = self._reader.readline()
+        if not line:
+            raise DaemonError("Connection closed by the daemon")
+        response = json.loads(line)
+        if 'error' in response:
+            raise DaemonError(response['error'])
+        return response['result']
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Serve Markdown/YAML conversions over a Unix socket.")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET,
+                        help=f"socket path (default: {DEFAULT_SOCKET})")
+    parser.add_argument('-j', '--workers', type=int, default=8,
+                        help="connections served concurrently (default: 8)")
+    parser.add_argument('--validation', choices=VALIDATION_MODES, default='strict',
+                        help="when to parse YAML blocks (default: strict)")
+    parser.add_argument('--fence', action='append', default=[],
+                        choices=sorted(BUILTIN_FENCES),
+                        help="also convert fences of this language (repeatable)")
+    args = parser.parse_args(argv)
+
+    converter = MarkdownYAMLConverter(
+        validation=args.validation,
+        fences=[BUILTIN_FENCES[language] for language in args.fence])
+    daemon = ConverterDaemon(args.socket, converter, args.workers)
+    print(f"Listening on {args.socket}", file=sys.stderr)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+@startuml
+title BlockIndex Class Diagram
+
+class BlockIndex {
+    + path: str
+    - _db: sqlite3.Connection
+    - _lock: Lock
+    + __init__(path: str)
+    + {static} block_record(language: str, start_line: int, end_line: int, content: str): Tuple
+    + {static} top_level_keys(content: str): List[str]
+    + record_document(path: str, records: Iterable[Tuple]): void
+    + has_document(path: str): bool
+    + remove_document(path: str): void
+    + remove_missing(): int
+    + files_with_key(key: str): List[str]
+    + blocks_with_key(key: str): List[Tuple[str, str, int, int, str]]
+    + blocks_with_hash(digest: str): List[Tuple[str, str, int, int, str]]
+    + close(): void
+}
+
+note right of BlockIndex
+  sqlite schema:
+  documents(id, path)
+  blocks(id, document_id, language, start_line, end_line, sha256)
+  block_keys(key, block_id)  -- B-tree on key
+end note
+
+MarkdownYAMLConverter --> BlockIndex: optional, fed during conversion
+
+@enduml
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    language TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_document ON blocks(document_id);
+CREATE INDEX IF NOT EXISTS blocks_sha256 ON blocks(sha256);
+CREATE TABLE IF NOT EXISTS block_keys (
+    key TEXT NOT NULL,
+    block_id INTEGER NOT NULL REFERENCES blocks(id) ON DELETE CASCADE,
+    PRIMARY KEY (key, block_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS block_keys_block ON block_keys(block_id);
+"""
+
+_BLOCK_COLUMNS = "d.path, b.language, b.start_line, b.end_line, b.sha256"
+
+# A mapping key at column 0: plain, or single/double quoted
+_TOP_LEVEL_KEY = re.compile(
+    r'''^(?:"([^"\n]*)"|'([^'\n]*)'|([^\s#'"\-?:{}\[\]][^:\n]*?))[ \t]*:(?=\s|$)''',
+    re.MULTILINE)
+
+
+class BlockIndex:
+    """Sidecar sqlite index of the fenced blocks in converted documents."""
+
+    def __init__(self, path: str = ':memory:'):
+        """
+        Opens or creates the index.
+
+        Args:
+            path: sqlite database file; in-memory when omitted. Several
+                processes may write the same file (WAL journal).
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            if path != ':memory:':
+                self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA foreign_keys=ON')
+            self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def block_record(language: str, start_line: int, end_line: int,
+                     content: str) -> Tuple[str, int, int, str, List[str]]:
+        """
+        Reduces a fence to what the index stores, so the body can be dropped.
+
+        Args:
+            language: Fence language
+            start_line: 1-based line of the opening fence
+            end_line: 1-based line of the closing fence
+            content: The fence body
+
+        Returns:
+            (language, start_line, end_line, sha256, top-level keys); the
+            hash matches the validation cache digest of the block
+        """
+        digest = hashlib.sha256(f"{language}\0{content}".encode('utf-8')).hexdigest()
+        keys = BlockIndex.top_level_keys(content) if language == 'yaml' else []
+        return language, start_line, end_line, digest, keys
+
+    @staticmethod
+    def top_level_keys(content: str) -> List[str]:
+        """
+        Finds the top-level mapping keys of a YAML block without parsing it.
+
+        Only unindented `key:` lines count, so nested keys, list items,
+        comments and block scalar bodies are skipped.
+
+        Args:
+            content: YAML block content
+
+        Returns:
+            Distinct keys in order of appearance
+        """
+        keys = {}
+        for match in _TOP_LEVEL_KEY.finditer(content):
+            key = next(group for group in match.groups() if group is not None)
+            keys.setdefault(key, None)
+        return list(keys)
+
+    def record_document(self, path: str,
+                        records: Iterable[Tuple[str, int, int, str, List[str]]]):
+        """
+        Replaces the indexed blocks of a document.
+
+        Args:
+            path: Source markdown file path
+            records: block_record() tuples in document order
+        """
+        path = os.path.abspath(path)
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM documents WHERE path = ?', (path,))
+            document_id = self._db.execute(
+                'INSERT INTO documents (path) VALUES (?)', (path,)).lastrowid
+            for language, start_line, end_line, digest, keys in records:
+                block_id = self._db.execute(
+                    'INSERT INTO blocks (document_id, language, start_line, '
+                    'end_line, sha256) VALUES (?, ?, ?, ?, ?)',
+                    (document_id, language, start_line, end_line, digest)).lastrowid
+                self._db.executemany(
+                    'INSERT INTO block_keys (key, block_id) VALUES (?, ?)',
+                    ((key, block_id) for key in keys))
+
+    def has_document(self, path: str) -> bool:
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM documents WHERE path = ?',
+                                   (os.path.abspath(path),)).fetchone()
+        return row is not None
+
+    def remove_document(self, path: str):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM documents WHERE path = ?',
+                             (os.path.abspath(path),))
+
+    def remove_missing(self) -> int:
+        """
+        Drops documents whose source file no longer exists.
+
+        Returns:
+            Number of documents removed
+        """
+        with self._lock, self._db:
+            missing = [(path,) for (path,) in
+                       self._db.execute('SELECT path FROM documents')
+                       if not os.path.exists(path)]
+            self._db.executemany('DELETE FROM documents WHERE path = ?', missing)
+        return len(missing)
+
+    def files_with_key(self, key: str) -> List[str]:
+        """
+        Lists the documents with a block that has key at the top level.
+
+        Args:
+            key: Top-level YAML key
+
+        Returns:
+            Sorted absolute document paths
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT DISTINCT d.path FROM block_keys k '
+                'JOIN blocks b ON b.id = k.block_id '
+                'JOIN documents d ON d.id = b.document_id '
+                'WHERE k.key = ? ORDER BY d.path', (key,)).fetchall()
+        return [path for (path,) in rows]
+
+    def blocks_with_key(self, key: str) -> List[Tuple[str, str, int, int, str]]:
+        """
+        Lists the blocks that have key at the top level.
+
+        Args:
+            key: Top-level YAML key
+
+        Returns:
+            (path, language, start_line, end_line, sha256) per block
+        """
+        with self._lock:
+            return self._db.execute(
+                f'SELECT {_BLOCK_COLUMNS} FROM block_keys k '
+                'JOIN blocks b ON b.id = k.block_id '
+                'JOIN documents d ON d.id = b.document_id '
+                'WHERE k.key = ? ORDER BY d.path, b.start_line', (key,)).fetchall()
+
+    def blocks_with_hash(self, digest: str) -> List[Tuple[str, str, int, int, str]]:
+        """
+        Lists the occurrences of one block content.
+
+        Args:
+            digest: sha256 as returned by block_record
+
+        Returns:
+            (path, language, start_line, end_line, sha256) per block
+        """
+        with self._lock:
+            return self._db.execute(
+                f'SELECT {_BLOCK_COLUMNS} FROM blocks b '
+                'JOIN documents d ON d.id = b.document_id '
+                'WHERE b.sha256 = ? ORDER BY d.path, b.start_line',
+                (digest,)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Look up fenced blocks by top-level YAML key.")
+    parser.add_argument('index', help="sqlite index written with --index")
+    parser.add_argument('key', help="top-level key to look up")
+    parser.add_argument('-l', '--files-only', action='store_true',
+                        help="only print the matching file paths")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index):
+        parser.error(f"no index at {args.index}")
+    index = BlockIndex(args.index)
+    try:
+        if args.files_only:
+            for path in index.files_with_key(args.key):
+                print(path)
+        else:
+            for path, language, start_line, end_line, _ in index.blocks_with_key(args.key):
+                print(f"{path}:{start_line}-{end_line} [{language}]")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
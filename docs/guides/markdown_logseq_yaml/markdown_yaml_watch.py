@@ -0,0 +1,292 @@
+"""
+@startuml
+title MarkdownYAMLWatch Class Diagram
+
+interface Watcher {
+    + wait(timeout: Optional[float]): Set[str]
+    + close(): void
+}
+
+class InotifyWatcher {
+    - _fd: int
+    - _dirs: Dict[int, str]
+    + __init__(root: str)
+    + wait(timeout: Optional[float]): Set[str]
+    + close(): void
+    - _add_tree(path: str): Set[str]
+}
+
+class PollingWatcher {
+    + interval: float
+    - _state: Dict[str, Tuple[int, int]]
+    + __init__(root: str, interval: float)
+    + wait(timeout: Optional[float]): Set[str]
+    + close(): void
+    - _scan(): Dict[str, Tuple[int, int]]
+}
+
+class "markdown_yaml_watch" as Watch {
+    + create_watcher(root: str, poll: bool): Watcher
+    + watch_directory(root: str, output_dir, include, exclude, debounce: float, poll: bool, on_result, cache, validation, stop: Optional[Event], fences: Sequence[str], index: Optional[str]): void
+}
+
+Watcher <|.. InotifyWatcher
+Watcher <|.. PollingWatcher
+Watch ..> Watcher: waits for changed paths
+Watch ..> MarkdownYAMLConverter: reconverts via save_converted_document
+
+@enduml
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Set, Tuple
+
+from markdown_yaml_batch import (DEFAULT_INCLUDE, FileResult, _convert_one,
+                                 _init_worker, effective_excludes, matches,
+                                 fence_languages, output_path_for)
+from markdown_yaml_cache import ConversionCache
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Recursive directory watcher on top of Linux inotify."""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Directory tree to watch
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, str] = {}
+        self._root = root
+        self._add_tree(root)
+
+    def _add_tree(self, path: str) -> Set[str]:
+        """
+        Watches path and its subdirectories.
+
+        Args:
+            path: Directory to add
+
+        Returns:
+            Files already present, which may have been moved in
+        """
+        files = set()
+        for dirpath, dirnames, filenames in os.walk(path):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath),
+                                              _WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = dirpath
+            files.update(os.path.join(dirpath, f) for f in filenames)
+        return files
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Blocks until files change or the timeout expires.
+
+        Args:
+            timeout: Seconds to wait; forever when None
+
+        Returns:
+            Paths of files written, created or moved in
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # Events were lost; rescan everything
+                    changed.update(self._add_tree(self._root))
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        changed.update(self._add_tree(path))
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Portable watcher comparing file sizes and mtimes at an interval."""
+
+    def __init__(self, root: str, interval: float = 0.25):
+        """
+        Args:
+            root: Directory tree to watch
+            interval: Seconds between scans
+        """
+        self._root = root
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        for dirpath, _, filenames in os.walk(self._root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Blocks until files change or the timeout expires.
+
+        Args:
+            timeout: Seconds to wait; forever when None
+
+        Returns:
+            Paths of files that are new or whose size or mtime changed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval
+            if deadline is not None:
+                remaining = min(remaining, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            state = self._scan()
+            changed = {path for path, stamp in state.items()
+                       if self._state.get(path) != stamp}
+            self._state = state
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(root: str, poll: bool = False):
+    """
+    Picks inotify on Linux and falls back to polling elsewhere.
+
+    Args:
+        root: Directory tree to watch
+        poll: Force the polling watcher
+
+    Returns:
+        InotifyWatcher or PollingWatcher
+    """
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root)
+
+
+def watch_directory(root: str, output_dir: Optional[str] = None,
+                    include: Sequence[str] = DEFAULT_INCLUDE,
+                    exclude: Sequence[str] = (),
+                    debounce: float = 0.05,
+                    poll: bool = False,
+                    on_result: Optional[Callable[[FileResult], None]] = None,
+                    cache: Optional[ConversionCache] = None,
+                    validation: str = 'strict',
+                    stop: Optional[threading.Event] = None,
+                    fences: Sequence[str] = (),
+                    index: Optional[str] = None):
+    """
+    Reconverts documents under root as they change, until stopped.
+
+    Changes are collected until no new event arrives for `debounce` seconds,
+    so an editor's burst of saves converts the page once. Each output is
+    replaced atomically by save_converted_document.
+
+    Args:
+        root: Directory to watch
+        output_dir: Directory mirroring root for outputs
+        include: Glob patterns selecting documents
+        exclude: Glob patterns dropping documents
+        debounce: Quiet period in seconds before converting
+        poll: Use the polling watcher even where inotify is available
+        on_result: Called with each FileResult
+        cache: Skips saves that did not change the content
+        validation: Validation mode of the converter
+        stop: Event that ends the loop; runs until interrupted when None
+        fences: BUILTIN_FENCES languages to convert besides yaml
+        index: sqlite BlockIndex file updated with each converted document
+    """
+    exclude = effective_excludes(root, output_dir, include, exclude)
+    _init_worker(frozenset(cache.blocks) if cache else None, validation, fences,
+                 index)
+    languages = fence_languages(fences)
+    watcher = create_watcher(root, poll)
+    try:
+        while stop is None or not stop.is_set():
+            changed = watcher.wait(None if stop is None else 0.5)
+            if not changed:
+                continue
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+
+            for path in sorted(changed):
+                if not os.path.isfile(path) or not matches(root, path, include, exclude):
+                    continue
+                output_path = output_path_for(path, root, output_dir)
+                if cache and cache.is_current(path, output_path, languages):
+                    continue
+                result = _convert_one(path, output_path)
+                if cache and result.cache_delta:
+                    cache.merge(result.cache_delta)
+                if on_result:
+                    on_result(result)
+    finally:
+        watcher.close()
@@ -0,0 +1,140 @@
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+
+from taxonomy_vs_ontology import CompactTaxonomy, Ontology, OntologyEntity, TaxonomyNode
+
+# Memory of the tree structure only: both builders share the same name
+# strings, so the names themselves are not counted. With 1M nodes and
+# fanout 8 (CPython 3.x, 64-bit):
+#
+#   store            unique names   1000 distinct names
+#   TaxonomyNode     ~178 B/node    ~178 B/node
+#   CompactTaxonomy   ~88 B/node     ~20 B/node
+#
+# CompactTaxonomy rows are five 4-byte columns; the rest is the interned
+# name table, one list slot and one dict entry per distinct name.
+
+def random_parents(nodes: int, fanout: int, seed: int = 0) -> List[int]:
+    # parents[i] < i, about fanout children per inner node
+    rng = random.Random(seed)
+    return [-1] + [rng.randrange(max(1, i // fanout), i) if i > fanout else 0
+                   for i in range(1, nodes)]
+
+def build_objects(names: List[str], parents: List[int]) -> TaxonomyNode:
+    nodes = [TaxonomyNode(name) for name in names]
+    for node, parent in zip(nodes[1:], parents[1:]):
+        nodes[parent].add_child(node)
+    return nodes[0]
+
+def build_compact(names: List[str], parents: List[int]) -> CompactTaxonomy:
+    tree = CompactTaxonomy()
+    for name, parent in zip(names, parents):
+        tree.add_node(name, parent)
+    return tree
+
+def measure(build: Callable, *args) -> Tuple[float, float]:
+    # Timed without tracemalloc, which slows allocation down several times
+    start = time.perf_counter()
+    tree = build(*args)
+    seconds = time.perf_counter() - start
+    del tree
+    tracemalloc.start()
+    tree = build(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tree
+    return size, seconds
+
+# Property lookups on an ontology of --entities entities (1M by default),
+# each with a categorical complexity_level and a numeric score
+LEVELS = ('low', 'medium', 'high')
+
+def build_ontology(entities: int, indexed: bool, seed: int = 0) -> Ontology:
+    rng = random.Random(seed)
+    ontology = Ontology()
+    if indexed:
+        ontology.create_index('complexity_level', 'hash')
+        ontology.create_index('score', 'sorted')
+    for i in range(entities):
+        entity = ontology.add_entity(OntologyEntity(f"technique-{i}"))
+        entity.add_property('complexity_level', rng.choice(LEVELS))
+        entity.add_property('score', str(rng.randrange(1000)))
+    return ontology
+
+# Property overwrites timed per ontology
+OVERWRITES = 10_000
+
+def benchmark_properties(entities: int, queries: int) -> int:
+    print(f"{'ontology':<10} {'build s':>8} {'equality ms':>12} {'range ms':>9} "
+          f"{'overwrite us':>13} {'matches':>9}")
+    results = []
+    for indexed in (False, True):
+        start = time.perf_counter()
+        ontology = build_ontology(entities, indexed)
+        build = time.perf_counter() - start
+        # Re-adding registered entities must leave the indexes unchanged
+        for entity in list(ontology.entities.values())[::100]:
+            ontology.add_entity(entity)
+        # First range query merges the sorted index's pending inserts
+        ontology.find_by_range('score', 0, 0)
+        start = time.perf_counter()
+        for i in range(queries):
+            matches = len(ontology.find_by_property('complexity_level', LEVELS[i % 3]))
+        equality = (time.perf_counter() - start) / queries
+        start = time.perf_counter()
+        for i in range(queries):
+            matches += len(ontology.find_by_range('score', i, i + 9))
+        ranged = (time.perf_counter() - start) / queries
+        # Re-scoring moves an entity within the sorted index; the same seed
+        # keeps both ontologies in agreement
+        rng = random.Random(1)
+        names = list(ontology.entities)
+        start = time.perf_counter()
+        for _ in range(OVERWRITES):
+            entity = ontology.entities[rng.choice(names)]
+            entity.add_property('score', str(rng.randrange(1000)))
+        overwrite = (time.perf_counter() - start) / OVERWRITES
+        print(f"{'indexed' if indexed else 'scan':<10} {build:>8.2f} {equality * 1000:>12.2f} "
+              f"{ranged * 1000:>9.2f} {overwrite * 1e6:>13.1f} {matches:>9}")
+        results.append(([sorted(ontology.find_by_property('complexity_level', level))
+                         for level in LEVELS],
+                        [sorted(ontology.find_by_range('score', i, i + 9))
+                         for i in range(0, 1000, 10)]))
+        del ontology
+    if results[0] != results[1]:
+        print("indexed and scan results differ", file=sys.stderr)
+        return 1
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare the memory of TaxonomyNode trees and CompactTaxonomy, "
+                    "or property lookups with and without secondary indexes.")
+    parser.add_argument('--nodes', type=int, default=1_000_000)
+    parser.add_argument('--fanout', type=int, default=8)
+    parser.add_argument('--vocabulary', type=int, default=0,
+                        help="distinct names to draw from (default: all names unique)")
+    parser.add_argument('--properties', action='store_true',
+                        help="compare property scans with secondary indexes instead")
+    parser.add_argument('--entities', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.properties:
+        return benchmark_properties(args.entities, args.queries)
+
+    vocabulary = args.vocabulary or args.nodes
+    names = [f"node-{i % vocabulary}" for i in range(args.nodes)]
+    parents = random_parents(args.nodes, args.fanout)
+    print(f"{'store':<16} {'MB':>8} {'bytes/node':>11} {'build s':>8}")
+    for label, build in (('TaxonomyNode', build_objects), ('CompactTaxonomy', build_compact)):
+        size, seconds = measure(build, names, parents)
+        print(f"{label:<16} {size / 2**20:>8.1f} {size / args.nodes:>11.1f} {seconds:>8.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import json
+import mmap
+import os
+import sys
+import tempfile
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from taxonomy_vs_ontology import CompactTaxonomy, Ontology
+
+# File layout: MAGIC, a little header, a JSON directory of sections, then the
+# sections themselves, each an array of fixed-size integers aligned to 8
+# bytes. Opening a snapshot maps the file and reads only the directory;
+# sections are zero-copy memoryviews, so loading time does not depend on
+# the snapshot size and processes mapping the same file share its pages.
+#
+#   strings.offsets, strings.data   sorted UTF-8 string table
+#   taxonomy.parent / .first_child / .next_sibling / .name
+#   taxonomy.by_name                nodes ordered by name id
+#   ontology.nodes                  string id of each node, ascending
+#   relation:<type>.indptr / .indices    CSR adjacency per relation type
+#   property:<key>.nodes / .values       sorted (node, value id) pairs
+MAGIC = b'TXONSNAP'
+SNAPSHOT_VERSION = 1
+_HEADER = 16
+
+# Writer
+def write_snapshot(path: str, taxonomy: Optional[CompactTaxonomy] = None,
+                   ontology: Optional[Ontology] = None) -> None:
+    strings = set()
+    if taxonomy is not None:
+        strings.update(taxonomy.names)
+    if ontology is not None:
+        strings.update(ontology._names)
+        for entity in ontology.entities.values():
+            for key, value in entity.properties.items():
+                strings.add(key)
+                strings.add(value)
+    strings = sorted(strings)
+    ids = {string: i for i, string in enumerate(strings)}
+
+    sections: List[Tuple[str, array]] = []
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = array('q', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    sections.append(('strings.offsets', offsets))
+    sections.append(('strings.data', array('B', b''.join(encoded))))
+
+    if taxonomy is not None:
+        names = array('i', (ids[taxonomy.names[name_id]] for name_id in taxonomy.name_id))
+        sections += [('taxonomy.parent', taxonomy.parent),
+                     ('taxonomy.first_child', taxonomy.first_child),
+                     ('taxonomy.next_sibling', taxonomy.next_sibling),
+                     ('taxonomy.name', names),
+                     ('taxonomy.by_name', array('i', sorted(range(len(names)),
+                                                            key=names.__getitem__)))]
+
+    relation_types: List[str] = []
+    property_keys: List[str] = []
+    if ontology is not None:
+        # Snapshot nodes follow string order, so a name maps to its node by
+        # binary search on ontology.nodes
+        nodes = sorted(ids[name] for name in ontology._names)
+        node_of = {string_id: node for node, string_id in enumerate(nodes)}
+        renumber = [node_of[ids[name]] for name in ontology._names]
+        sections.append(('ontology.nodes', array('i', nodes)))
+        relation_types = sorted(ontology._inverse)
+        for relation_type in relation_types:
+            indptr, indices = ontology.adjacency(relation_type)
+            edges = sorted((renumber[source], renumber[indices[i]])
+                           for source in range(len(indptr) - 1)
+                           for i in range(indptr[source], indptr[source + 1]))
+            counts = [0] * len(nodes)
+            for source, _ in edges:
+                counts[source] += 1
+            starts = array('i', [0])
+            for count in counts:
+                starts.append(starts[-1] + count)
+            sections.append((f'relation:{relation_type}.indptr', starts))
+            sections.append((f'relation:{relation_type}.indices',
+                             array('i', (target for _, target in edges))))
+        columns: Dict[str, List[Tuple[int, int]]] = {}
+        for entity in ontology.entities.values():
+            node = renumber[ontology._ids[entity.name]]
+            for key, value in entity.properties.items():
+                columns.setdefault(key, []).append((node, ids[value]))
+        property_keys = sorted(columns)
+        for key in property_keys:
+            pairs = sorted(columns[key])
+            sections.append((f'property:{key}.nodes', array('i', (node for node, _ in pairs))))
+            sections.append((f'property:{key}.values', array('i', (value for _, value in pairs))))
+
+    # Directory offsets depend on the directory's own size; section offsets
+    # are relative to the aligned end of the directory
+    directory = {'byteorder': sys.byteorder, 'relation_types': relation_types,
+                 'property_keys': property_keys, 'sections': {}}
+    position = 0
+    for name, values in sections:
+        size = len(values) * values.itemsize
+        directory['sections'][name] = [values.typecode, position, len(values)]
+        position += _aligned(size)
+    encoded_directory = json.dumps(directory).encode('utf-8')
+
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                         prefix='.snapshot-')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(MAGIC)
+            f.write(SNAPSHOT_VERSION.to_bytes(4, 'little'))
+            f.write(len(encoded_directory).to_bytes(4, 'little'))
+            f.write(encoded_directory)
+            f.write(bytes(_aligned(_HEADER + len(encoded_directory)) - _HEADER - len(encoded_directory)))
+            for _, values in sections:
+                size = len(values) * values.itemsize
+                values.tofile(f)
+                f.write(bytes(_aligned(size) - size))
+        # Processes still mapping the old file keep its pages
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+def _lower_bound(values: Sequence, target, key=lambda value: value) -> int:
+    low, high = 0, len(values)
+    while low < high:
+        middle = (low + high) // 2
+        if key(values[middle]) < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+# Reader
+class OntologySnapshot:
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._mmap[:_HEADER]
+        if header[:8] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an ontology snapshot")
+        version = int.from_bytes(header[8:12], 'little')
+        length = int.from_bytes(header[12:16], 'little')
+        directory = json.loads(self._mmap[_HEADER:_HEADER + length])
+        if version != SNAPSHOT_VERSION or directory['byteorder'] != sys.byteorder:
+            self._mmap.close()
+            raise ValueError(f"{path}: unsupported snapshot version {version} "
+                             f"({directory['byteorder']}-endian)")
+        self.relation_types: List[str] = directory['relation_types']
+        self.property_keys: List[str] = directory['property_keys']
+        self._view = view = memoryview(self._mmap)
+        base = _aligned(_HEADER + length)
+        self._sections: Dict[str, memoryview] = {}
+        for name, (typecode, offset, count) in directory['sections'].items():
+            size = array(typecode).itemsize
+            start = base + offset
+            self._sections[name] = view[start:start + count * size].cast(typecode)
+        self._offsets = self._sections['strings.offsets']
+        self._data = self._sections['strings.data']
+
+    def close(self) -> None:
+        for section in self._sections.values():
+            section.release()
+        self._sections.clear()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> 'OntologySnapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # String table
+    def string(self, string_id: int) -> str:
+        return str(self._data[self._offsets[string_id]:self._offsets[string_id + 1]], 'utf-8')
+
+    def string_id(self, string: str) -> Optional[int]:
+        encoded = string.encode('utf-8')
+        offsets, data = self._offsets, self._data
+        string_id = _lower_bound(range(len(offsets) - 1), encoded,
+                                 lambda i: data[offsets[i]:offsets[i + 1]].tobytes())
+        if string_id < len(offsets) - 1 and data[offsets[string_id]:offsets[string_id + 1]] == encoded:
+            return string_id
+        return None
+
+    # Taxonomy
+    def taxonomy_nodes(self, name: str) -> List[int]:
+        string_id = self.string_id(name)
+        if string_id is None or 'taxonomy.name' not in self._sections:
+            return []
+        names, by_name = self._sections['taxonomy.name'], self._sections['taxonomy.by_name']
+        start = _lower_bound(by_name, string_id, names.__getitem__)
+        end = _lower_bound(by_name, string_id + 1, names.__getitem__)
+        return by_name[start:end].tolist()
+
+    def name(self, node: int) -> str:
+        return self.string(self._sections['taxonomy.name'][node])
+
+    def parent(self, node: int) -> int:
+        return self._sections['taxonomy.parent'][node]
+
+    def children(self, node: int) -> Iterator[int]:
+        next_sibling = self._sections['taxonomy.next_sibling']
+        child = self._sections['taxonomy.first_child'][node]
+        while child != -1:
+            yield child
+            child = next_sibling[child]
+
+    def get_ancestors(self, node: int) -> List[str]:
+        parent, ancestors = self._sections['taxonomy.parent'], []
+        current = parent[node]
+        while current != -1:
+            ancestors.append(self.name(current))
+            current = parent[current]
+        return ancestors
+
+    # Ontology
+    def _node(self, name: str) -> Optional[int]:
+        string_id = self.string_id(name)
+        nodes = self._sections.get('ontology.nodes')
+        if string_id is None or nodes is None:
+            return None
+        node = _lower_bound(nodes, string_id)
+        return node if node < len(nodes) and nodes[node] == string_id else None
+
+    def get_related_entities(self, name: str, relation_type: str) -> List[str]:
+        node = self._node(name)
+        indptr = self._sections.get(f'relation:{relation_type}.indptr')
+        if node is None or indptr is None:
+            return []
+        indices, nodes = self._sections[f'relation:{relation_type}.indices'], self._sections['ontology.nodes']
+        return [self.string(nodes[target]) for target in indices[indptr[node]:indptr[node + 1]]]
+
+    def get_property(self, name: str, key: str) -> Optional[str]:
+        node = self._node(name)
+        nodes = self._sections.get(f'property:{key}.nodes')
+        if node is None or nodes is None:
+            return None
+        i = _lower_bound(nodes, node)
+        if i < len(nodes) and nodes[i] == node:
+            return self.string(self._sections[f'property:{key}.values'][i])
+        return None
@@ -1,5 +1,12 @@
-from typing import Dict, List, Optional, Set
+import gc
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
 from dataclasses import dataclass
+from array import array
+from itertools import accumulate, chain
+from operator import itemgetter
 
 # Taxonomy Implementation
 class TaxonomyNode:
@@ -7,10 +14,13 @@ class TaxonomyNode:
         self.name = name
         self.children: List[TaxonomyNode] = []
         self.parent: Optional[TaxonomyNode] = None
+        self.index: Optional['TaxonomyIndex'] = None
 
     def add_child(self, child: 'TaxonomyNode') -> None:
         self.children.append(child)
         child.parent = self
+        if self.index:
+            self.index.node_added(child)
 
     def get_ancestors(self) -> List[str]:
         ancestors = []
@@ -20,6 +30,502 @@ class TaxonomyNode:
             current = current.parent
         return ancestors
 
+# Query Cache
+class QueryCache:
+    # Results tagged with the generation they were computed at. A mutation
+    # only bumps the generation; a stale entry is recomputed and replaced
+    # on its next read, and swept out once the cache outgrows max_entries.
+    def __init__(self, max_entries: int = 100_000):
+        self.generation = 0
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0}
+        self._entries: Dict[Tuple, Tuple[int, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def bump(self) -> None:
+        self.generation += 1
+
+    def get(self, key: Tuple, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == self.generation:
+            self.stats['hits'] += 1
+            return entry[1]
+        self.stats['misses'] += 1
+        return default
+
+    def put(self, key: Tuple, value: Any) -> Any:
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            generation = self.generation
+            self._entries = {k: entry for k, entry in self._entries.items()
+                             if entry[0] == generation}
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+        self._entries[key] = (self.generation, value)
+        return value
+
+# Free labels left between consecutive interval bounds when (re)labelling
+LABEL_GAP = 1 << 32
+# Smallest spacing a subtree is relabelled with after an append ran out of room
+MIN_LABEL_STEP = 1 << 16
+
+class TaxonomyIndex:
+    # Interval labels answer ancestor/subtree queries in O(1) and absorb
+    # add_child in place: into the free gap while it lasts, then by
+    # relabelling the smallest enclosing subtree that still has room. The
+    # Euler tour and its sparse table (O(1) LCA) are only rebuilt with the
+    # labels; after an append lca climbs skew-binary jump pointers, kept up
+    # to date in O(1) per node, in O(log depth), and descendants walks the
+    # subtree.
+    def __init__(self, root: TaxonomyNode):
+        self.root = root
+        self.low: Dict[TaxonomyNode, int] = {}
+        self.high: Dict[TaxonomyNode, int] = {}
+        self._labels_ok = False
+        self._tour_ok = False
+        self._shift = 0
+        self._nodes: List[TaxonomyNode] = []
+        self._first: Dict[TaxonomyNode, int] = {}
+        self._position: Dict[TaxonomyNode, int] = {}
+        self._size: Dict[TaxonomyNode, int] = {}
+        self._euler = array('q')
+        self._table: Optional[List[array]] = None
+        self._depth: Dict[TaxonomyNode, int] = {}
+        self._jump: Dict[TaxonomyNode, TaxonomyNode] = {}
+        self.cache = QueryCache()
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        # Iterative DFS: labels, pre-order, subtree sizes, Euler tour and
+        # jump pointers
+        root = self.root
+        root.index = self
+        self._depth, self._jump = {root: 0}, {root: root}
+        label = LABEL_GAP
+        low, high, size = {root: label}, {}, {}
+        first, position = {root: 0}, {root: 0}
+        nodes, depths, euler = [root], [0], [0]
+        stack = [(root, iter(root.children))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                label += LABEL_GAP
+                high[node] = label
+                size[node] = len(nodes) - position[node]
+                if stack:
+                    euler.append(position[stack[-1][0]])
+                continue
+            label += LABEL_GAP
+            child.index = self
+            self._link(child)
+            low[child] = label
+            first[child] = len(euler)
+            position[child] = len(nodes)
+            euler.append(len(nodes))
+            nodes.append(child)
+            depths.append(len(stack))
+            stack.append((child, iter(child.children)))
+
+        # Sparse table entries order by depth, then by pre-order position
+        self._shift = len(nodes).bit_length()
+        self._euler = array('q', ((depths[i] << self._shift) | i for i in euler))
+        self.low, self.high = low, high
+        self._nodes, self._first, self._position, self._size = nodes, first, position, size
+        self._labels_ok = True
+        self._tour_ok = True
+        self._table = None
+
+    def node_added(self, child: TaxonomyNode) -> None:
+        self._tour_ok = False
+        self.cache.bump()
+        if child.index is self or not self._labels_ok:
+            # Re-parented inside the tree, or labels already stale
+            self._attach(child)
+            self._labels_ok = False
+            return
+        parent = child.parent
+        siblings = parent.children
+        start = self.high[siblings[-2]] if len(siblings) > 1 else self.low[parent]
+        subtree = self._attach(child)
+        # The n-th sibling takes 1/(n + 1) of the free gap rather than half,
+        # so about sqrt(gap) appends to one parent fit before relabelling
+        step = (self.high[parent] - start) // (len(siblings) + 1) // (2 * len(subtree) + 1)
+        if step < 1:
+            self._relabel(parent)
+            return
+        label = start
+        stack = [(child, iter(child.children))]
+        self.low[child] = label = label + step
+        while stack:
+            node = next(stack[-1][1], None)
+            if node is None:
+                self.high[stack.pop()[0]] = label = label + step
+            else:
+                self.low[node] = label = label + step
+                stack.append((node, iter(node.children)))
+
+    def _relabel(self, node: TaxonomyNode) -> None:
+        # Climb to the smallest subtree whose interval spaces its labels at
+        # least MIN_LABEL_STEP apart (the root may widen its own) and spread
+        # it out again. Each high is preceded by one free step per child plus
+        # one, and node keeps half the interval, so further appends there,
+        # wide or nested, land in the free gap.
+        target = node
+        units = self._units(node)
+        while True:
+            step = (self.high[node] - self.low[node]) // (2 * units - 1)
+            if step >= MIN_LABEL_STEP or node.parent is None:
+                break
+            parent = node.parent
+            units += 3 + len(parent.children) + sum(
+                self._units(sibling) for sibling in parent.children if sibling is not node)
+            node = parent
+        if node.parent is None:
+            step = max(step, LABEL_GAP)
+        label = self.low[node]
+        stack = [(node, iter(node.children))]
+        while stack:
+            current, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                slack = len(current.children) + 2 + (units if current is target else 0)
+                self.high[current] = label = label + slack * step
+            else:
+                self.low[child] = label = label + step
+                stack.append((child, iter(child.children)))
+
+    def _units(self, node: TaxonomyNode) -> int:
+        # Label steps a subtree takes in _relabel, counting its low bound
+        units, stack = 0, [node]
+        while stack:
+            current = stack.pop()
+            units += 3 + len(current.children)
+            stack.extend(current.children)
+        return units
+
+    def _link(self, node: TaxonomyNode) -> None:
+        # Myers' skew-binary jump pointers: a jump spans 2^k - 1 levels, so
+        # any ancestor is reached in O(log depth) jumps and parent steps
+        parent = node.parent
+        depth, jump = self._depth, self._jump[parent]
+        if depth[parent] - depth[jump] == depth[jump] - depth[self._jump[jump]]:
+            self._jump[node] = self._jump[jump]
+        else:
+            self._jump[node] = parent
+        depth[node] = depth[parent] + 1
+
+    def _attach(self, child: TaxonomyNode) -> List[TaxonomyNode]:
+        # Parents are reached before their children
+        subtree, stack = [], [child]
+        while stack:
+            node = stack.pop()
+            node.index = self
+            self._link(node)
+            subtree.append(node)
+            stack.extend(node.children)
+        return subtree
+
+    def _labels(self) -> None:
+        if not self._labels_ok:
+            self._rebuild()
+
+    def is_ancestor(self, ancestor: TaxonomyNode, node: TaxonomyNode) -> bool:
+        self._labels()
+        return self.low[ancestor] < self.low[node] and self.high[node] < self.high[ancestor]
+
+    def in_subtree(self, node: TaxonomyNode, root: TaxonomyNode) -> bool:
+        self._labels()
+        return self.low[root] <= self.low[node] and self.high[node] <= self.high[root]
+
+    def descendants(self, node: TaxonomyNode) -> List[TaxonomyNode]:
+        # A subtree is a contiguous slice of the pre-order; after a change
+        # it is walked instead, in the same order
+        if not self._tour_ok:
+            nodes, stack = [], node.children[::-1]
+            while stack:
+                current = stack.pop()
+                nodes.append(current)
+                stack.extend(reversed(current.children))
+            return nodes
+        start = self._position[node]
+        return self._nodes[start + 1:start + self._size[node]]
+
+    def get_ancestors(self, node: TaxonomyNode) -> List[str]:
+        # Cached TaxonomyNode.get_ancestors; the list is shared, do not modify
+        ancestors = self.cache.get(('ancestors', node))
+        if ancestors is None:
+            ancestors = self.cache.put(('ancestors', node), node.get_ancestors())
+        return ancestors
+
+    def lca(self, a: TaxonomyNode, b: TaxonomyNode) -> TaxonomyNode:
+        self._labels()
+        if not self._tour_ok:
+            # Lowest ancestor of a whose interval contains b
+            low, high, jump = self.low, self.high, self._jump
+            start, end = low[b], high[b]
+            while not (low[a] <= start and end <= high[a]):
+                target = jump[a]
+                a = a.parent if low[target] <= start and end <= high[target] else target
+            return a
+        if self._table is None:
+            self._build_table()
+        i, j = self._first[a], self._first[b]
+        if i > j:
+            i, j = j, i
+        level = (j - i + 1).bit_length() - 1
+        row = self._table[level]
+        best = min(row[i], row[j - (1 << level) + 1])
+        return self._nodes[best & ((1 << self._shift) - 1)]
+
+    def _build_table(self) -> None:
+        # table[k][i] = min of euler[i:i + 2**k]
+        table = [self._euler]
+        width = 1
+        while 2 * width <= len(self._euler):
+            prev = table[-1]
+            table.append(array('q', map(min, prev[:len(prev) - width], prev[width:])))
+            width *= 2
+        self._table = table
+
+class CompactTaxonomy:
+    # Columnar tree: node i is row i of parallel array('i') columns, -1 for
+    # none. Names are interned once in a table, so a row is 20 bytes against
+    # ~180 for a TaxonomyNode (see benchmark_taxonomy_vs_ontology.py).
+    def __init__(self):
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        # Keeps appends O(1) while preserving child order
+        self.last_child = array('i')
+        self.name_id = array('i')
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def intern(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def add_node(self, name: str, parent: int = -1) -> int:
+        node = len(self.parent)
+        self.name_id.append(self.intern(name))
+        self.parent.append(-1)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.last_child.append(-1)
+        if parent >= 0:
+            self.link(parent, node)
+        return node
+
+    def link(self, parent: int, child: int) -> None:
+        if self.parent[child] != -1:
+            raise ValueError(f"{self.name(child)!r} already has a parent")
+        self.parent[child] = parent
+        last = self.last_child[parent]
+        if last == -1:
+            self.first_child[parent] = child
+        else:
+            self.next_sibling[last] = child
+        self.last_child[parent] = child
+
+    def name(self, node: int) -> str:
+        return self.names[self.name_id[node]]
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child != -1:
+            yield child
+            child = self.next_sibling[child]
+
+    def roots(self) -> List[int]:
+        return [node for node, parent in enumerate(self.parent) if parent == -1]
+
+    def node(self, node: int) -> 'CompactNode':
+        return CompactNode(self, node)
+
+    def new_node(self, name: str) -> 'CompactNode':
+        # Detached node, attached later with add_child like TaxonomyNode(name)
+        return CompactNode(self, self.add_node(name))
+
+    @classmethod
+    def from_tree(cls, root: TaxonomyNode) -> 'CompactTaxonomy':
+        tree = cls()
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            row = tree.add_node(node.name, parent)
+            stack.extend((child, row) for child in reversed(node.children))
+        return tree
+
+    @classmethod
+    def from_nested(cls, data: Any) -> 'CompactTaxonomy':
+        # Mappings nest their values under each key, sequences list siblings
+        # and scalars are leaves; nodes are numbered in pre-order
+        tree = cls()
+        stack = [(-1, _nested_entries(data))]
+        while stack:
+            parent, entries = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
+            name, children = entry
+            node = tree.add_node(str(name), parent)
+            if children is not None:
+                stack.append((node, _nested_entries(children)))
+        return tree
+
+    @classmethod
+    def from_yaml(cls, text: str) -> 'CompactTaxonomy':
+        # PyYAML is only needed for this loader
+        import yaml
+        return cls.from_nested(yaml.load(text, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader)))
+
+    @classmethod
+    def from_outline(cls, lines: Iterable[str], bullets: bool = True) -> 'CompactTaxonomy':
+        # Markdown headings and bullet outline, see load_outline
+        tree = cls()
+        stack: List[Tuple[Tuple[int, int], int]] = []
+        for key, name in _outline_items(lines, bullets):
+            while stack and stack[-1][0] >= key:
+                stack.pop()
+            node = tree.add_node(name, stack[-1][1] if stack else -1)
+            stack.append((key, node))
+        return tree
+
+def _nested_entries(value: Any) -> Iterator[Tuple[Any, Any]]:
+    if isinstance(value, dict):
+        yield from value.items()
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                yield from item.items()
+            else:
+                yield item, None
+    else:
+        yield value, None
+
+class CompactNode:
+    # TaxonomyNode API over one CompactTaxonomy row; holds no data itself
+    __slots__ = ('tree', 'id')
+
+    def __init__(self, tree: CompactTaxonomy, node: int):
+        self.tree = tree
+        self.id = node
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CompactNode) and other.tree is self.tree and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.id))
+
+    def __repr__(self) -> str:
+        return f"CompactNode({self.name!r})"
+
+    @property
+    def name(self) -> str:
+        return self.tree.name(self.id)
+
+    @property
+    def children(self) -> List['CompactNode']:
+        return [CompactNode(self.tree, child) for child in self.tree.children(self.id)]
+
+    @property
+    def parent(self) -> Optional['CompactNode']:
+        parent = self.tree.parent[self.id]
+        return None if parent == -1 else CompactNode(self.tree, parent)
+
+    def add_child(self, child: 'CompactNode') -> None:
+        self.tree.link(self.id, child.id)
+
+    def get_ancestors(self) -> List[str]:
+        tree, ancestors = self.tree, []
+        current = tree.parent[self.id]
+        while current != -1:
+            ancestors.append(tree.name(current))
+            current = tree.parent[current]
+        return ancestors
+
+# Outline Loading
+_HEADING = re.compile(r'(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$')
+_BULLET = re.compile(r'(?:[-*+]|\d+[.)])[ \t]+(.*?)[ \t]*$')
+_FENCE = re.compile(r'`{3,}|~{3,}')
+
+def _outline_items(lines: Iterable[str], bullets: bool = True) -> Iterator[Tuple[Tuple[int, int], str]]:
+    # (depth key, name) per heading or list item. Headings order by level;
+    # list items nest below the closest heading by indentation. Fenced code
+    # and other lines are skipped; the first character picks the pattern.
+    fence = None
+    for line in lines:
+        text = line.lstrip(' \t')
+        first = text[:1]
+        if first == '`' or first == '~':
+            match = _FENCE.match(text)
+            if match:
+                run = match.group()
+                if fence is None:
+                    fence = run
+                elif run[0] == fence[0] and len(run) >= len(fence):
+                    fence = None
+                continue
+        if fence:
+            continue
+        if first == '#':
+            match = _HEADING.match(text)
+            if match and match.group(2):
+                yield (len(match.group(1)), 0), match.group(2)
+        elif bullets and first and (first in '-*+' or first.isdigit()):
+            match = _BULLET.match(text)
+            if match and match.group(1):
+                indent = line[:len(line) - len(text)]
+                yield (7, len(indent.expandtabs(4)) if '\t' in indent else len(indent)), match.group(1)
+
+def load_outline(lines: Iterable[str], bullets: bool = True,
+                 root_name: Optional[str] = None, pause_gc: bool = False) -> TaxonomyNode:
+    # One streaming pass with an explicit stack, so neither the number of
+    # lines nor the depth is limited. Names are interned, and children are
+    # appended directly since new nodes have no index to notify. Several
+    # top-level items hang below a root_name node ('root' by default).
+    root = TaxonomyNode(root_name or 'root')
+    names: Dict[str, str] = {}
+    stack = [((0, -1), root)]
+    # Every node stays reachable, so cyclic GC passes during the build only
+    # cost time (about 70% of it on large outlines). Collection is process
+    # wide, so it is only paused when the caller asks for it.
+    collecting = pause_gc and gc.isenabled()
+    if collecting:
+        gc.disable()
+    try:
+        for key, name in _outline_items(lines, bullets):
+            while stack[-1][0] >= key:
+                stack.pop()
+            parent = stack[-1][1]
+            node = TaxonomyNode(names.setdefault(name, name))
+            node.parent = parent
+            parent.children.append(node)
+            stack.append((key, node))
+    finally:
+        if collecting:
+            gc.enable()
+    if root_name is None and len(root.children) == 1:
+        root = root.children[0]
+        root.parent = None
+    return root
+
+def load_outline_file(path: str, bullets: bool = True,
+                      root_name: Optional[str] = None, pause_gc: bool = False) -> TaxonomyNode:
+    with open(path, encoding='utf-8') as f:
+        return load_outline(f, bullets, root_name, pause_gc)
+
 # Ontology Implementation
 @dataclass
 class Relationship:
@@ -32,21 +538,446 @@ class OntologyEntity:
         self.name = name
         self.relationships: List[Relationship] = []
         self.properties: Dict[str, str] = {}
+        # Targets by relation type, kept in step with relationships
+        self._related: Dict[str, Set[str]] = {}
+        self.ontology: Optional['Ontology'] = None
 
     def add_relationship(self, relation_type: str, target: str,
                         properties: Dict[str, str] = None) -> None:
         self.relationships.append(
             Relationship(relation_type, target, properties)
         )
+        self._related.setdefault(relation_type, set()).add(target)
+        if self.ontology:
+            self.ontology.relationship_added(self.name, relation_type, target)
 
     def add_property(self, key: str, value: str) -> None:
+        old_value = self.properties.get(key)
         self.properties[key] = value
+        if self.ontology:
+            self.ontology.property_added(self.name, key, value, old_value)
 
     def get_related_entities(self, relation_type: Optional[str] = None) -> Set[str]:
         if relation_type:
-            return {rel.target_entity for rel in self.relationships
-                    if rel.relation_type == relation_type}
-        return {rel.target_entity for rel in self.relationships}
+            return set(self._related.get(relation_type, ()))
+        return set().union(*self._related.values())
+
+def _number(value: str) -> Optional[float]:
+    # Numeric coercion for range queries; NaN has no place in an order
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+# Entries per block of a SortedPropertyIndex; a block splits at twice this
+SORTED_BLOCK_SIZE = 1000
+
+class SortedPropertyIndex:
+    # Entity names ordered by the numeric value of one property; values that
+    # are not numbers are left out, and equal values keep insertion order.
+    # Entries are sorted by (value, insertion order) in blocks of parallel
+    # lists, as in sortedcontainers, so an overwrite bisects to its entry
+    # and shifts one block instead of the whole index. Inserts are buffered
+    # and merged on the next query or removal: one by one while few, by
+    # rebuilding the blocks after bulk loads.
+    def __init__(self):
+        self._values: List[List[float]] = []
+        self._orders: List[List[int]] = []
+        self._names: List[List[str]] = []
+        # Last (value, order) of each block
+        self._maxes: List[Tuple[float, int]] = []
+        self._keys: Dict[str, Tuple[float, int]] = {}
+        self._pending: List[Tuple[float, int, str]] = []
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, name: str, value: str) -> None:
+        number = _number(value)
+        if number is not None:
+            self._keys[name] = (number, self._next)
+            self._pending.append((number, self._next, name))
+            self._next += 1
+
+    def remove(self, name: str, value: str) -> None:
+        # value is only part of the signature; the stored key is exact
+        key = self._keys.pop(name, None)
+        if key is None:
+            return
+        self._flush()
+        block = bisect_left(self._maxes, key)
+        values, orders = self._values[block], self._orders[block]
+        i = bisect_left(values, key[0])
+        i = bisect_left(orders, key[1], i, bisect_right(values, key[0], i))
+        del values[i]
+        del orders[i]
+        del self._names[block][i]
+        if not values:
+            del self._values[block], self._orders[block], self._names[block], self._maxes[block]
+        elif i == len(values):
+            self._maxes[block] = (values[-1], orders[-1])
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> List[str]:
+        # Names with low <= value <= high, in value order
+        self._flush()
+        maxes = self._maxes
+        first = 0 if low is None else bisect_left(maxes, (low,))
+        last = len(maxes) - 1
+        if high is not None:
+            last = min(last, bisect_right(maxes, (high, float('inf'))))
+        names = []
+        for block in range(first, last + 1):
+            values = self._values[block]
+            start = bisect_left(values, low) if block == first and low is not None else 0
+            end = bisect_right(values, high) if block == last and high is not None else len(values)
+            names += self._names[block][start:end]
+        return names
+
+    def _flush(self) -> None:
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        # Stable: equal values stay in insertion order
+        pending.sort(key=itemgetter(0))
+        if len(pending) * 64 < len(self._keys):
+            for number, order, name in pending:
+                self._insert(number, order, name)
+            return
+        merged = list(heapq.merge(
+            zip(chain.from_iterable(self._values), chain.from_iterable(self._orders),
+                chain.from_iterable(self._names)),
+            pending, key=itemgetter(0)))
+        self._values, self._orders, self._names, self._maxes = [], [], [], []
+        for i in range(0, len(merged), SORTED_BLOCK_SIZE):
+            rows = merged[i:i + SORTED_BLOCK_SIZE]
+            self._values.append([number for number, _, _ in rows])
+            self._orders.append([order for _, order, _ in rows])
+            self._names.append([name for _, _, name in rows])
+            self._maxes.append(rows[-1][:2])
+
+    def _insert(self, number: float, order: int, name: str) -> None:
+        # order is newer than every stored entry, so it goes after equal values
+        if not self._maxes:
+            self._values.append([number])
+            self._orders.append([order])
+            self._names.append([name])
+            self._maxes.append((number, order))
+            return
+        block = min(bisect_left(self._maxes, (number, order)), len(self._maxes) - 1)
+        values, orders, names = self._values[block], self._orders[block], self._names[block]
+        i = bisect_right(values, number)
+        values.insert(i, number)
+        orders.insert(i, order)
+        names.insert(i, name)
+        if i == len(values) - 1:
+            self._maxes[block] = (number, order)
+        if len(values) > 2 * SORTED_BLOCK_SIZE:
+            half = len(values) // 2
+            self._values[block + 1:block + 1] = [values[half:]]
+            self._orders[block + 1:block + 1] = [orders[half:]]
+            self._names[block + 1:block + 1] = [names[half:]]
+            self._maxes.insert(block, (values[half - 1], orders[half - 1]))
+            del values[half:], orders[half:], names[half:]
+
+# numpy/scipy are optional: imported on the first batched query, with a
+# pure-Python traversal over the same CSR arrays when they are missing
+_SPARSE = None
+# Visited cells per chunk of a batched sparse traversal (bytes of bool)
+SPARSE_BATCH_CELLS = 1 << 24
+
+def _sparse_modules():
+    global _SPARSE
+    if _SPARSE is None:
+        try:
+            import numpy
+            import scipy.sparse
+            _SPARSE = (numpy, scipy.sparse)
+        except ImportError:
+            _SPARSE = False
+    return _SPARSE
+
+class Ontology:
+    # Entities by name plus the inverse of every relationship:
+    # relation type -> target -> source entity names. Traversals run over
+    # CSR adjacency arrays per relation type, built lazily and kept with the
+    # query results in a generation-versioned QueryCache.
+    def __init__(self):
+        self.entities: Dict[str, OntologyEntity] = {}
+        self._inverse: Dict[str, Dict[str, Set[str]]] = {}
+        # Node ids cover entities and relationship targets alike
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self.cache = QueryCache()
+        # Optional secondary indexes on chosen property keys
+        self._hash_indexes: Dict[str, Dict[str, Set[str]]] = {}
+        self._sorted_indexes: Dict[str, SortedPropertyIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def add_entity(self, entity: OntologyEntity) -> OntologyEntity:
+        current = self.entities.get(entity.name)
+        if current is entity:
+            # Already registered; re-indexing would duplicate sorted entries
+            return entity
+        if current is not None:
+            raise ValueError(f"Duplicate entity {entity.name!r}")
+        self.entities[entity.name] = entity
+        entity.ontology = self
+        self._intern(entity.name)
+        self.cache.bump()
+        for rel in entity.relationships:
+            self.relationship_added(entity.name, rel.relation_type, rel.target_entity)
+        for key, value in entity.properties.items():
+            self.property_added(entity.name, key, value)
+        return entity
+
+    def get_entity(self, name: str) -> Optional[OntologyEntity]:
+        return self.entities.get(name)
+
+    def relationship_added(self, source: str, relation_type: str, target: str) -> None:
+        self._inverse.setdefault(relation_type, {}).setdefault(target, set()).add(source)
+        self._intern(target)
+        self.cache.bump()
+
+    def property_added(self, name: str, key: str, value: str,
+                       old_value: Optional[str] = None) -> None:
+        self.cache.bump()
+        by_value = self._hash_indexes.get(key)
+        if by_value is not None:
+            if old_value is not None:
+                names = by_value[old_value]
+                names.discard(name)
+                if not names:
+                    del by_value[old_value]
+            by_value.setdefault(value, set()).add(name)
+        ordered = self._sorted_indexes.get(key)
+        if ordered is not None:
+            if old_value is not None:
+                ordered.remove(name, old_value)
+            ordered.add(name, value)
+
+    def create_index(self, key: str, kind: str = 'hash') -> None:
+        # 'hash' serves find_by_property, 'sorted' serves find_by_range;
+        # existing entities are indexed now, later ones by add_property
+        if kind == 'hash':
+            by_value = self._hash_indexes[key] = {}
+            for name, entity in self.entities.items():
+                if key in entity.properties:
+                    by_value.setdefault(entity.properties[key], set()).add(name)
+        elif kind == 'sorted':
+            ordered = self._sorted_indexes[key] = SortedPropertyIndex()
+            for name, entity in self.entities.items():
+                if key in entity.properties:
+                    ordered.add(name, entity.properties[key])
+        else:
+            raise ValueError(f"Unknown index kind {kind!r}, expected 'hash' or 'sorted'")
+
+    def find_by_property(self, key: str, value: str) -> Set[str]:
+        by_value = self._hash_indexes.get(key)
+        if by_value is not None:
+            return set(by_value.get(value, ()))
+        return {name for name, entity in self.entities.items()
+                if entity.properties.get(key) == value}
+
+    def find_by_range(self, key: str, low: Optional[float] = None,
+                      high: Optional[float] = None) -> List[str]:
+        # Entities whose property coerces to a number in [low, high], in
+        # value order
+        ordered = self._sorted_indexes.get(key)
+        if ordered is not None:
+            return ordered.range(low, high)
+        matches = []
+        for name, entity in self.entities.items():
+            number = _number(entity.properties.get(key))
+            if (number is not None and (low is None or number >= low)
+                    and (high is None or number <= high)):
+                matches.append((number, name))
+        return [name for _, name in sorted(matches, key=itemgetter(0))]
+
+    def get_referring_entities(self, target: str,
+                               relation_type: Optional[str] = None) -> Set[str]:
+        # Who points at target, e.g. every entity that is-a Mammal
+        if relation_type:
+            return set(self._inverse.get(relation_type, {}).get(target, ()))
+        return set().union(*(by_target.get(target, ()) for by_target in self._inverse.values()))
+
+    def get_related_entities(self, name: str, relation_type: Optional[str] = None,
+                             depth: int = 1) -> FrozenSet[str]:
+        # Cached OntologyEntity.get_related_entities, or everything within
+        # depth hops of one relation type
+        if depth != 1:
+            if relation_type is None:
+                raise ValueError("Multi-hop queries need a relation_type")
+            return self.closure(name, relation_type, depth)
+        key = ('related', name, relation_type)
+        related = self.cache.get(key)
+        if related is None:
+            entity = self.entities.get(name)
+            related = self.cache.put(key, frozenset(
+                entity.get_related_entities(relation_type) if entity else ()))
+        return related
+
+    def _intern(self, name: str) -> int:
+        node = self._ids.get(name)
+        if node is None:
+            node = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return node
+
+    def adjacency(self, relation_type: str) -> Tuple[array, array]:
+        # CSR: the targets of node i are indices[indptr[i]:indptr[i + 1]]
+        csr = self.cache.get(('adjacency', relation_type))
+        if csr is None:
+            ids = self._ids
+            edges = sorted((ids[entity.name], ids[target])
+                           for entity in self.entities.values()
+                           for target in entity._related.get(relation_type, ()))
+            counts = [0] * len(self._names)
+            for source, _ in edges:
+                counts[source] += 1
+            indptr = array('i', accumulate(counts, initial=0))
+            indices = array('i', (target for _, target in edges))
+            csr = self.cache.put(('adjacency', relation_type), (indptr, indices))
+        return csr
+
+    def closure(self, name: str, relation_type: str,
+                max_depth: Optional[int] = None) -> FrozenSet[str]:
+        # Everything reachable from name in 1..max_depth hops (unbounded by
+        # default): transitive is-a ancestors, has-parts within 3 hops, ...
+        return self.closure_batch([name], relation_type, max_depth)[name]
+
+    def closure_batch(self, names: Iterable[str], relation_type: str,
+                      max_depth: Optional[int] = None) -> Dict[str, FrozenSet[str]]:
+        results, missing = {}, []
+        for name in names:
+            cached = self.cache.get(('closure', name, relation_type, max_depth))
+            if cached is not None:
+                results[name] = cached
+            elif name not in self._ids:
+                results[name] = frozenset()
+            elif name not in results:
+                results[name] = None
+                missing.append(name)
+        if missing:
+            sources = [self._ids[name] for name in missing]
+            modules = _sparse_modules() if len(sources) > 1 else False
+            if modules:
+                reached = self._bfs_sparse(modules, sources, relation_type, max_depth)
+            else:
+                reached = [self._bfs(source, relation_type, max_depth) for source in sources]
+            for name, nodes in zip(missing, reached):
+                result = frozenset(self._names[node] for node in nodes)
+                results[name] = self.cache.put(('closure', name, relation_type, max_depth), result)
+        return results
+
+    def _bfs(self, source: int, relation_type: str,
+             max_depth: Optional[int]) -> Set[int]:
+        indptr, indices = self.adjacency(relation_type)
+        seen: Set[int] = set()
+        frontier, depth = [source], 0
+        while frontier and (max_depth is None or depth < max_depth):
+            reached = []
+            for node in frontier:
+                for target in indices[indptr[node]:indptr[node + 1]]:
+                    if target not in seen:
+                        seen.add(target)
+                        reached.append(target)
+            frontier, depth = reached, depth + 1
+        return seen
+
+    def _bfs_sparse(self, modules, sources: List[int], relation_type: str,
+                    max_depth: Optional[int]) -> List[Iterable[int]]:
+        # One frontier row per source; each hop is a sparse matrix product.
+        # Visited nodes are a dense bool matrix, so a hop costs only the
+        # edges it follows; rows are processed in chunks to bound its size.
+        numpy, sparse = modules
+        n = len(self._names)
+        matrix = self.cache.get(('matrix', relation_type))
+        if matrix is None:
+            indptr, indices = self.adjacency(relation_type)
+            matrix = self.cache.put(('matrix', relation_type), sparse.csr_matrix(
+                (numpy.ones(len(indices), dtype=numpy.int32),
+                 numpy.frombuffer(indices, dtype=numpy.int32),
+                 numpy.frombuffer(indptr, dtype=numpy.int32)), shape=(n, n)))
+        chunk = max(1, SPARSE_BATCH_CELLS // max(n, 1))
+        results: List[Iterable[int]] = []
+        for offset in range(0, len(sources), chunk):
+            batch = sources[offset:offset + chunk]
+            rows = len(batch)
+            seen = numpy.zeros((rows, n), dtype=bool)
+            frontier = sparse.csr_matrix(
+                (numpy.ones(rows, dtype=numpy.int32), (numpy.arange(rows), batch)),
+                shape=(rows, n))
+            depth = 0
+            while frontier.nnz and (max_depth is None or depth < max_depth):
+                reached = (frontier @ matrix).tocoo()
+                fresh = ~seen[reached.row, reached.col]
+                row, col = reached.row[fresh], reached.col[fresh]
+                seen[row, col] = True
+                frontier = sparse.csr_matrix(
+                    (numpy.ones(len(row), dtype=numpy.int32), (row, col)), shape=(rows, n))
+                depth += 1
+            results.extend(numpy.flatnonzero(seen_row).tolist() for seen_row in seen)
+        return results
+
+# Consistency Checking
+@dataclass
+class Violation:
+    kind: str
+    entity: str
+    target: str
+
+def check_consistency(taxonomy, entities,
+                      relation_type: str = 'is-a') -> Iterator[Violation]:
+    # Streams the relation_type edges of entities (an Ontology or any
+    # iterable of OntologyEntity) that taxonomy ancestry does not back:
+    #   unknown-entity / unknown-target  name not in the taxonomy
+    #   inverted   the target is the entity itself or one of its descendants
+    #   unrelated  the target is on another branch
+    # taxonomy is a TaxonomyIndex, or a root node to index. Interval labels
+    # make each edge O(1), so a run is O(V + E) when names are unique.
+    index = taxonomy if isinstance(taxonomy, TaxonomyIndex) else TaxonomyIndex(taxonomy)
+    index._labels()
+    nodes = list(index.low)
+    # name -> (low, high) interval label
+    spans = dict(zip([node.name for node in nodes],
+                     zip(index.low.values(), map(index.high.__getitem__, nodes))))
+    # Names on several nodes: the edge holds if any pair of them does
+    repeated: Dict[str, List[Tuple[int, int]]] = {}
+    if len(spans) < len(nodes):
+        for node in nodes:
+            repeated.setdefault(node.name, []).append((index.low[node], index.high[node]))
+        repeated = {name: found for name, found in repeated.items() if len(found) > 1}
+    if isinstance(entities, Ontology):
+        entities = entities.entities.values()
+    for entity in entities:
+        targets_of = entity._related.get(relation_type)
+        if not targets_of:
+            continue
+        source = spans.get(entity.name)
+        for target in targets_of:
+            if source is None:
+                yield Violation('unknown-entity', entity.name, target)
+                continue
+            target_span = spans.get(target)
+            if target_span is None:
+                yield Violation('unknown-target', entity.name, target)
+                continue
+            if not repeated or (entity.name not in repeated and target not in repeated):
+                if target_span[0] < source[0] and source[1] < target_span[1]:
+                    continue
+                pairs = ((source, target_span),)
+            else:
+                pairs = [(s, t) for s in repeated.get(entity.name, (source,))
+                         for t in repeated.get(target, (target_span,))]
+                if any(t[0] < s[0] and s[1] < t[1] for s, t in pairs):
+                    continue
+            inverted = any(s[0] <= t[0] and t[1] <= s[1] for s, t in pairs)
+            yield Violation('inverted' if inverted else 'unrelated', entity.name, target)
 
 # Example Usage
 def create_animal_taxonomy() -> TaxonomyNode: